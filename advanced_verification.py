@@ -15,12 +15,47 @@ Date: December 2025
 
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy import stats
 from scipy.optimize import curve_fit
 import time
 import json
-from multiprocessing import Pool, cpu_count
-from tqdm import tqdm
+import argparse
+from contextlib import nullcontext
+from functools import partial
+import level_index
+import progress_monitor
+import profiling
+import resource_planner
+import results_artifact
+import figure_renderer
+import worker_pool
+from reducers import merge_partials, reduce_chunk, DEFAULT_REDUCERS, MAX_CHUNK
+
+# Prometheus-style metrics file refreshed while parallel_compute runs
+METRICS_FILE = 'collatz_metrics.prom'
+
+# Columnar binary artifact written next to verification_results.json
+ARTIFACT_FILE = 'verification_results.collatz'
+
+# Wall time per pipeline stage, reported in the saved metadata
+stage_timer = profiling.StageTimer()
+
+# Test points with logarithmic spacing
+N_VALUES = [
+    100, 200, 500, 
+    1000, 2000, 5000,
+    10000, 20000, 50000,
+    100000, 200000, 500000,
+    1000000
+]
+
+# Stored in the compact steps array for numbers that hit the safety limit
+STEPS_UNKNOWN = np.iinfo(np.uint16).max
+
+# Approximate memory per number for resource planning: a (steps, n)
+# tuple in the worker plus its pickled copy while a chunk is in flight,
+# and the tuple plus array entries the parent keeps for the whole run
+IN_FLIGHT_BYTES_PER_NUMBER = 240
+RESIDENT_BYTES_PER_POINT = 136
 
 def collatz_steps(n):
     """Compute stopping time for number n with optimization"""
@@ -37,46 +72,232 @@ def collatz_steps(n):
             return -1
     return steps
 
+def collatz_trajectory(n):
+    """Stopping time, peak value and odd-step count in a single pass
+    
+    Returns (-1, peak, odd_steps) when the safety limit is exceeded.
+    """
+    steps = 0
+    odd_steps = 0
+    peak = n
+    original = n
+    while n != 1:
+        if n % 2 == 0:
+            n = n >> 1
+        else:
+            n = 3 * n + 1
+            odd_steps += 1
+            if n > peak:
+                peak = n
+        steps += 1
+        if steps > 100000:  # Safety limit
+            print(f"Warning: {original} exceeded 100000 steps")
+            return -1, peak, odd_steps
+    return steps, peak, odd_steps
+
+def compact_array(values, dtype):
+    """np.array(values, dtype), falling back to Python ints on overflow"""
+    try:
+        return np.array(values, dtype=dtype)
+    except OverflowError:
+        return np.array(values, dtype=object)
+
 def compute_batch(args):
-    """Compute Collatz steps for a batch of numbers"""
-    start, end = args
+    """Compute Collatz steps for a batch of numbers
+    
+    args is (start, end) or (start, end, track_extremes). Returns
+    (max_steps, points, partials, extremes) where partials are the
+    registered reducers (see reducers.py) updated with this batch, so every
+    metric is computed in the same pass. With track_extremes, each
+    trajectory's peak and odd-step count come from the same iteration and
+    extremes holds them as parallel arrays indexed by n - start, plus the
+    batch's peak records; otherwise extremes is None.
+    """
+    start, end = args[:2]
+    track_extremes = len(args) > 2 and args[2]
     max_steps = 0
     points = []
-    
-    for n in range(start, end + 1):
-        steps = collatz_steps(n)
-        if steps > 0:
-            points.append((steps, n))
-            if steps > max_steps:
-                max_steps = steps
-    
-    return max_steps, points
+    all_steps = []
+    extremes = None
+    chunk_start_time = time.perf_counter_ns()
+    progress_monitor.start_chunk(start)
+    
+    if track_extremes:
+        peaks = []
+        odd_counts = []
+        peak_records = []
+        record_peak = 0
+        for n in range(start, end + 1):
+            steps, peak, odd_steps = collatz_trajectory(n)
+            all_steps.append(steps if steps >= 0 else STEPS_UNKNOWN)
+            peaks.append(peak)
+            odd_counts.append(odd_steps)
+            if peak > record_peak:
+                record_peak = peak
+                peak_records.append((n, peak))
+            if steps > 0:
+                points.append((steps, n))
+                if steps > max_steps:
+                    max_steps = steps
+        
+        extremes = {
+            'start': start,
+            'steps': np.array(all_steps, dtype=np.uint16),
+            'peak': compact_array(peaks, np.uint64),
+            'odd_steps': np.array(odd_counts, dtype=np.uint16),
+            'peak_records': peak_records
+        }
+    else:
+        for n in range(start, end + 1):
+            steps = collatz_steps(n)
+            all_steps.append(steps if steps >= 0 else STEPS_UNKNOWN)
+            if steps > 0:
+                points.append((steps, n))
+                if steps > max_steps:
+                    max_steps = steps
+    
+    step_array = np.array(all_steps, dtype=np.uint16)
+    partials = reduce_chunk(start, step_array)
+    
+    progress_monitor.finish_chunk(end - start + 1,
+                                  int(sum(p[0] for p in points)),
+                                  time.perf_counter_ns() - chunk_start_time)
+    
+    return max_steps, points, partials, extremes
 
-def parallel_compute(N, num_processes=None):
-    """Compute Collatz data using parallel processing"""
-    if num_processes is None:
-        num_processes = cpu_count()
-    
-    print(f"Using {num_processes} CPU cores for parallel computation...")
+def merge_peak_records(record_lists):
+    """Combine per-batch peak records (in range order) into global records"""
+    merged = []
+    record_peak = 0
+    for records in record_lists:
+        for n, peak in records:
+            if peak > record_peak:
+                record_peak = peak
+                merged.append((n, peak))
+    return merged
+
+def merge_extremes(extremes_list):
+    """Concatenate per-batch extremes (in range order) into one set of arrays"""
+    peaks = [e['peak'] for e in extremes_list]
+    if any(p.dtype == object for p in peaks):
+        peaks = [p.astype(object) for p in peaks]
+    return {
+        'start': extremes_list[0]['start'],
+        'steps': np.concatenate([e['steps'] for e in extremes_list]),
+        'peak': np.concatenate(peaks),
+        'odd_steps': np.concatenate([e['odd_steps'] for e in extremes_list]),
+        'peak_records': merge_peak_records([e['peak_records'] for e in extremes_list])
+    }
+
+def distribution_summary(histogram, quantiles=(0.5, 0.9, 0.99, 0.999)):
+    """Mean, variance and quantiles of stopping times from a histogram"""
+    histogram = np.asarray(histogram, dtype=np.int64)
+    steps = np.arange(len(histogram))
+    total = histogram.sum()
+    mean = float((steps * histogram).sum() / total)
+    variance = float((histogram * (steps - mean)**2).sum() / total)
+    
+    # Smallest s with P(steps <= s) >= q
+    cumulative = np.cumsum(histogram)
+    quantile_values = {
+        str(q): int(np.searchsorted(cumulative, q * total))
+        for q in quantiles
+    }
     
-    # Split work into batches
-    batch_size = N // num_processes
-    batches = [(i * batch_size + 1, min((i + 1) * batch_size, N)) 
-               for i in range(num_processes)]
+    return {
+        'count': int(total),
+        'mean': mean,
+        'variance': variance,
+        'std': float(np.sqrt(variance)),
+        'quantiles': quantile_values
+    }
+
+def parallel_compute(N, num_processes=None, chunk_size=None,
+                     metrics_file=METRICS_FILE, report_interval=2.0,
+                     track_extremes=False, pool=None, backend='process'):
+    """Compute Collatz data using parallel processing
+    
+    The range is split into many small chunks (16 per process by default)
+    so that progress reported by the monitor thread advances smoothly.
+    Unless given, the process count and chunk size come from
+    resource_planner (allowed cores, cgroup quota, available memory).
+    num_processes only sizes a new pool; a running pool of another size
+    is used as is, with a warning.
+    Work runs on pool, by default the shared warm worker pool, so
+    successive checkpoints reuse the same initialized workers.
+    backend='thread' computes in threads of this process instead (see
+    thread_backend.py); it does not support track_extremes.
+    Returns (max_steps, points, reduced, extremes) where reduced maps each
+    registered reducer's name to its finalized result; extremes is None
+    unless track_extremes is set (see compute_batch).
+    """
+    resources = resource_planner.plan(N, IN_FLIGHT_BYTES_PER_NUMBER, RESIDENT_BYTES_PER_POINT)
+    if backend == 'thread':
+        return thread_compute(N, num_processes or resources.processes,
+                              min(chunk_size or resources.chunk_size, MAX_CHUNK), metrics_file,
+                              report_interval, track_extremes)
+    if pool is None:
+        pool = worker_pool.shared_pool(num_processes or resources.processes)
+    if num_processes and num_processes != pool.processes:
+        print(f"⚠️ {num_processes} processes requested, but the running pool has "
+              f"{pool.processes}; computing on the pool")
+    if pool.processes != resources.processes:
+        # Size chunks for the pool that is actually running
+        resources = resource_planner.plan(N, IN_FLIGHT_BYTES_PER_NUMBER, RESIDENT_BYTES_PER_POINT,
+                                          processes=pool.processes)
+    num_processes = pool.processes
+    if chunk_size is None:
+        chunk_size = resources.chunk_size
+    # Reducers keep exact int64 sums only up to MAX_CHUNK numbers per chunk
+    chunk_size = min(chunk_size, MAX_CHUNK)
+    
+    print(f"Using {num_processes} CPU cores for parallel computation "
+          f"(chunks of {chunk_size:,})...")
+    for warning in resources.warnings:
+        print(f"⚠️ {warning}")
+    
+    # Split work into chunks covering 1..N
+    batches = [(start, min(start + chunk_size - 1, N), track_extremes)
+               for start in range(1, N + 1, chunk_size)]
     
     # Parallel computation
-    with Pool(num_processes) as pool:
-        results = list(tqdm(pool.imap(compute_batch, batches), 
-                           total=len(batches), 
-                           desc=f"Computing N={N:,}"))
+    with pool.monitored(N, label=f"N={N:,}", interval=report_interval,
+                        metrics_file=metrics_file):
+        with stage_timer.stage('kernels'):
+            results = list(pool.imap(partial(profiling.run_profiled, compute_batch),
+                                     batches))
     
     # Combine results
-    max_steps = max(r[0] for r in results)
-    all_points = []
-    for _, points in results:
-        all_points.extend(points)
-    
-    return max_steps, all_points
+    with stage_timer.stage('merge'):
+        max_steps = max(r[0] for r in results)
+        all_points = []
+        reducers = [cls() for cls in DEFAULT_REDUCERS]
+        for _, points, partials, _ in results:
+            all_points.extend(points)
+            merge_partials(reducers, partials)
+        reduced = {r.name: r.finalize() for r in reducers}
+        extremes = merge_extremes([r[3] for r in results]) if track_extremes else None
+    
+    return max_steps, all_points, reduced, extremes
+
+def thread_compute(N, threads, chunk_size, metrics_file, report_interval, track_extremes):
+    """parallel_compute on the thread backend: one shared step table, no pickling"""
+    import thread_backend
+    if track_extremes:
+        raise ValueError("track_extremes needs the process backend")
+    backend = thread_backend.ThreadBackend(threads)
+    print(f"Using {threads} threads ({backend.kernel} kernel) for parallel computation "
+          f"(chunks of {chunk_size:,})...")
+    
+    with stage_timer.stage('kernels'):
+        table, reduced = backend.compute(N, chunk_size, label=f"N={N:,}",
+                                         interval=report_interval, metrics_file=metrics_file)
+    
+    with stage_timer.stage('merge'):
+        n = np.flatnonzero(table) + 1
+        points = list(zip(table[n - 1].tolist(), n.tolist()))
+    
+    return reduced['max']['W'], points, reduced, None
 
 def logarithmic_model(x, a, b):
     """Logarithmic model: W = a * ln(x) + b"""
@@ -86,9 +307,7 @@ def power_law_model(x, a, b):
     """Power law model: W = a * x^b"""
     return a * np.power(x, b)
 
-def comprehensive_verification():
-    """Perform comprehensive verification across multiple scales"""
-    
+def print_banner():
     print("="*80)
     print("ADVANCED COLLATZ GEOMETRIC VERIFICATION")
     print("Million-Scale Computational Analysis")
@@ -96,17 +315,24 @@ def comprehensive_verification():
     print(f"Author: Sahil Khan")
     print(f"Date: {time.strftime('%Y-%m-%d %H:%M:%S')}")
     print("="*80)
+
+def comprehensive_verification(track_extremes=False, N_values=N_VALUES, save_steps=False,
+                               backend='process'):
+    """Perform comprehensive verification across multiple scales
+    
+    With track_extremes, each checkpoint also reports the largest
+    trajectory peak and odd-step statistics, and the per-n arrays for the
+    largest N are saved to trajectory_extremes.npz. With save_steps, the
+    step table of the largest N is stored in the results artifact.
+    backend selects process workers or threads (see parallel_compute).
+    """
     
-    # Define test points with logarithmic spacing
-    N_values = [
-        100, 200, 500, 
-        1000, 2000, 5000,
-        10000, 20000, 50000,
-        100000, 200000, 500000,
-        1000000
-    ]
+    print_banner()
     
     results = []
+    histograms = []
+    envelopes = []
+    residues = []
     
     for N in N_values:
         print(f"\n{'='*80}")
@@ -115,58 +341,249 @@ def comprehensive_verification():
         
         start_time = time.time()
         
-        # Parallel computation
-        W, points = parallel_compute(N)
+        # Parallel computation; all reducers run in the same pass
+        W, points, reduced, extremes = parallel_compute(N, track_extremes=track_extremes,
+                                                        backend=backend)
         
         elapsed = time.time() - start_time
         
-        # Statistical analysis
-        x = np.array([p[0] for p in points])
-        y = np.array([p[1] for p in points])
-        
-        # Linear regression for tilt angle
-        slope, intercept, r_value, p_value, std_err = stats.linregress(x, y)
-        angle = np.arctan(slope) * 180 / np.pi
+        # Linear regression for tilt angle, from the regression moments
+        regression = reduced['regression']
+        angle = regression['tilt_angle']
+        r_squared = regression['r_squared']
+        p_value = regression['p_value']
         
         # Aspect ratio
         aspect_ratio = N / W
         
         # Density analysis
         total_area = N * W
-        actual_points = len(points)
+        actual_points = regression['count']
         density = actual_points / total_area
         
+        # Stopping-time distribution
+        histogram = reduced['histogram']['histogram']
+        distribution = distribution_summary(histogram)
+        histograms.append(histogram)
+        
+        # Boundary envelope and its hull / fitted parallelogram
+        envelope = reduced['envelope']
+        envelopes.append(envelope)
+        residues.append(reduced['residues'])
+        
         result = {
             'N': N,
             'W': W,
             'H': N,
             'aspect_ratio': aspect_ratio,
             'tilt_angle': angle,
-            'r_squared': r_value**2,
+            'r_squared': r_squared,
             'p_value': p_value,
-            'std_error': std_err,
+            'std_error': regression['std_error'],
             'density': density,
             'forbidden_zone': 1 - density,
             'computation_time': elapsed,
-            'points_count': actual_points
+            'points_count': actual_points,
+            'steps_mean': distribution['mean'],
+            'steps_variance': distribution['variance'],
+            'steps_quantiles': distribution['quantiles'],
+            'records_count': len(reduced['records']['records']),
+            **geometry_fields(envelope['geometry'])
         }
         
+        if extremes is not None:
+            peak_n, max_peak = extremes['peak_records'][-1]
+            odd_steps = extremes['odd_steps'].astype(np.float64)
+            result.update({
+                'max_peak': int(max_peak),
+                'max_peak_n': int(peak_n),
+                'peak_records_count': len(extremes['peak_records']),
+                'odd_steps_mean': float(odd_steps.mean()),
+                'odd_steps_max': int(extremes['odd_steps'].max())
+            })
+        
         results.append(result)
         
         print(f"\nResults:")
         print(f"  W (max steps) = {W}")
         print(f"  H/W (aspect ratio) = {aspect_ratio:.4f}")
         print(f"  θ (tilt angle) = {angle:.4f}°")
-        print(f"  R² = {r_value**2:.8f}")
+        print(f"  R² = {r_squared:.8f}")
         print(f"  p-value = {p_value:.2e}")
         print(f"  Density = {density:.8f} ({density*100:.6f}%)")
         print(f"  Forbidden zone = {(1-density)*100:.6f}%")
+        print(f"  Steps mean = {distribution['mean']:.4f}, std = {distribution['std']:.4f}")
+        if envelope['geometry'] is not None:
+            print(f"  Hull area = {envelope['geometry']['hull_area']:,.0f}, "
+                  f"fitted parallelogram fill = {envelope['geometry']['fill_ratio']:.4f}")
         print(f"  Computation time = {elapsed:.2f}s")
     
+    with stage_timer.stage('save'):
+        results_artifact.clear_arrays(ARTIFACT_FILE)
+        save_distributions(N_values, histograms)
+        save_envelopes(envelopes)
+        save_residues(residues)
+        if track_extremes:
+            save_extremes(extremes)
+        if save_steps:
+            save_step_table(points, N)
+    
+    return results
+
+def geometry_fields(geometry):
+    """Per-checkpoint result fields derived from the boundary envelope"""
+    if geometry is None:
+        return {}
+    return {
+        'hull_area': geometry['hull_area'],
+        'parallelogram_area': geometry['parallelogram_area'],
+        'parallelogram_edge_slopes': geometry['edge_slopes'],
+        'hull_fill_ratio': geometry['fill_ratio']
+    }
+
+def save_envelopes(envelopes, artifact=ARTIFACT_FILE):
+    """Store min/max n per stopping time for every checkpoint
+    
+    envelopes[i, s] = (min n, max n) with stopping time s for checkpoint
+    i, zero where s does not occur.
+    """
+    width = max(len(e['max_n']) for e in envelopes)
+    table = np.zeros((len(envelopes), width, 2), dtype=np.int64)
+    for i, e in enumerate(envelopes):
+        table[i, :len(e['min_n']), 0] = e['min_n']
+        table[i, :len(e['max_n']), 1] = e['max_n']
+    results_artifact.save_array(artifact, 'envelopes', table)
+
+def save_residues(residues, artifact=ARTIFACT_FILE):
+    """Store stopping-time statistics per residue class n mod 2^k
+    
+    residues[i] holds the (count, mean, max) rows for checkpoint i.
+    """
+    table = np.array([[r['count'], r['mean'], r['max']] for r in residues], dtype=np.float64)
+    results_artifact.save_array(artifact, 'residues', table)
+
+def save_step_table(points, N, artifact=ARTIFACT_FILE):
+    """Store steps[n - 1] for n <= N as uint16 in the results artifact"""
+    table = np.zeros(N, dtype=np.uint16)
+    points = np.array(points, dtype=np.int64).reshape(-1, 2)
+    table[points[:, 1] - 1] = points[:, 0]
+    results_artifact.save_array(artifact, 'steps', table)
+    level_index.build_index(table, artifact)
+    
+    print(f"✅ Step table and level index for N={N:,} saved to: {artifact}")
+
+def streaming_verification(N_values=N_VALUES, memory_budget=None):
+    """Verify all checkpoints in one streaming pass without a points list
+    
+    Produces the same per-checkpoint fields as comprehensive_verification,
+    computed from mergeable reducers, so memory stays within memory_budget
+    bytes however large N gets. computation_time is the time spent since
+    the previous checkpoint.
+    """
+    import streaming_pipeline
+    
+    print_banner()
+    print(f"Streaming 1..{max(N_values):,} through reducers "
+          f"({len(N_values)} checkpoints in a single pass)")
+    
+    results = []
+    histograms = []
+    envelopes = []
+    residues = []
+    options = {'metrics_file': METRICS_FILE}
+    if memory_budget:
+        options['memory_budget'] = memory_budget
+    
+    last_time = time.time()
+    with stage_timer.stage('kernels'):
+        for N, reduced in streaming_pipeline.stream_checkpoints(N_values, **options):
+            now = time.time()
+            elapsed = now - last_time
+            last_time = now
+            
+            W = reduced['max']['W']
+            regression = reduced['regression']
+            histogram = reduced['histogram']['histogram']
+            distribution = distribution_summary(histogram)
+            histograms.append(histogram)
+            envelopes.append(reduced['envelope'])
+            residues.append(reduced['residues'])
+            
+            actual_points = regression['count']
+            density = actual_points / (N * W)
+            
+            results.append({
+                'N': N,
+                'W': W,
+                'H': N,
+                'aspect_ratio': N / W,
+                'tilt_angle': regression['tilt_angle'],
+                'r_squared': regression['r_squared'],
+                'p_value': regression['p_value'],
+                'std_error': regression['std_error'],
+                'density': density,
+                'forbidden_zone': 1 - density,
+                'computation_time': elapsed,
+                'points_count': actual_points,
+                'steps_mean': distribution['mean'],
+                'steps_variance': distribution['variance'],
+                'steps_quantiles': distribution['quantiles'],
+                'records_count': len(reduced['records']['records']),
+                **geometry_fields(reduced['envelope']['geometry'])
+            })
+            
+            print(f"N = {N:>12,}: W = {W}, θ = {regression['tilt_angle']:.4f}°, "
+                  f"R² = {regression['r_squared']:.8f}, density = {density:.8f}")
+    
+    with stage_timer.stage('save'):
+        results_artifact.clear_arrays(ARTIFACT_FILE)
+        save_distributions(N_values, histograms)
+        save_envelopes(envelopes)
+        save_residues(residues)
+    
     return results
 
-def statistical_analysis(results):
-    """Perform rigorous statistical analysis"""
+def save_distributions(N_values, histograms, filename='stopping_time_distribution.npz',
+                       artifact=ARTIFACT_FILE):
+    """Save per-checkpoint stopping-time histograms in compact binary form
+    
+    Row i of 'histograms' counts stopping times for n <= N_values[i],
+    zero-padded to a common width. The table is also stored in the
+    results artifact.
+    """
+    table = np.zeros((len(histograms), max(len(h) for h in histograms)), dtype=np.int64)
+    for i, h in enumerate(histograms):
+        table[i, :len(h)] = h
+    
+    np.savez_compressed(filename, N_values=np.asarray(N_values, dtype=np.int64),
+                        histograms=table)
+    results_artifact.save_array(artifact, 'histograms', table)
+    
+    print(f"\n✅ Distributions saved to: {filename}")
+
+def save_extremes(extremes, filename='trajectory_extremes.npz'):
+    """Save per-n steps, peak and odd-step arrays plus the peak records"""
+    records = np.array(extremes['peak_records'], dtype=object)
+    np.savez_compressed(filename, start=extremes['start'], steps=extremes['steps'],
+                        peak=extremes['peak'], odd_steps=extremes['odd_steps'],
+                        peak_record_n=np.array(records[:, 0], dtype=np.int64),
+                        peak_record_value=compact_array(list(records[:, 1]), np.uint64))
+    
+    print(f"✅ Trajectory extremes saved to: {filename}")
+
+def load_distributions(filename='stopping_time_distribution.npz'):
+    """Load per-checkpoint histograms saved by save_distributions"""
+    with np.load(filename) as data:
+        return {int(N): h for N, h in zip(data['N_values'], data['histograms'])}
+
+def statistical_analysis(results=None, artifact=None):
+    """Perform rigorous statistical analysis
+    
+    With artifact (a path), the checkpoint results are read from a saved
+    results artifact instead of being passed in.
+    """
+    if artifact is not None:
+        results = results_artifact.load_artifact(artifact).results()
     
     print("\n" + "="*80)
     print("STATISTICAL HYPOTHESIS TESTING")
@@ -182,7 +599,8 @@ def statistical_analysis(results):
     log_N = np.log(N_values)
     
     # Fit logarithmic model
-    popt_log, pcov_log = curve_fit(logarithmic_model, N_values, W_values)
+    with stage_timer.stage('curve_fit'):
+        popt_log, pcov_log = curve_fit(logarithmic_model, N_values, W_values)
     a_log, b_log = popt_log
     perr_log = np.sqrt(np.diag(pcov_log))
     
@@ -202,7 +620,8 @@ def statistical_analysis(results):
     print("\n2. POWER LAW HYPOTHESIS: W(N) = a·N^b")
     print("-" * 80)
     
-    popt_pow, pcov_pow = curve_fit(power_law_model, N_values, W_values, p0=[1, 0.5])
+    with stage_timer.stage('curve_fit'):
+        popt_pow, pcov_pow = curve_fit(power_law_model, N_values, W_values, p0=[1, 0.5])
     a_pow, b_pow = popt_pow
     perr_pow = np.sqrt(np.diag(pcov_pow))
     
@@ -263,15 +682,16 @@ def statistical_analysis(results):
         'power_law': {'a': a_pow, 'b': b_pow, 'r_squared': r_squared_pow, 'aic': aic_pow}
     }
 
-def save_results(results, models):
-    """Save results to JSON for publication"""
+def save_results(results, models, artifact=ARTIFACT_FILE):
+    """Save results to JSON for publication, plus the binary artifact"""
     
     output = {
         'metadata': {
             'author': 'Sahil Khan',
             'email': 'ksksohail07@gmail.com',
             'date': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'description': 'Advanced Collatz Geometric Analysis - Million-Scale Verification'
+            'description': 'Advanced Collatz Geometric Analysis - Million-Scale Verification',
+            'stage_timings': stage_timer.table()
         },
         'data_points': results,
         'statistical_models': models,
@@ -286,12 +706,64 @@ def save_results(results, models):
     with open('verification_results.json', 'w') as f:
         json.dump(output, f, indent=2)
     
+    results_artifact.write_artifact(artifact, results, models,
+                                    output['metadata'], output['summary'])
+    
     print("\n✅ Results saved to: verification_results.json")
+    print(f"✅ Binary artifact saved to: {artifact}")
+
+def create_publication_plots(results=None, models=None, artifact=None, histograms=None,
+                             pool=None):
+    """Create publication-quality plots
+    
+    With artifact (a path), results and models are read from a saved
+    results artifact; models passed explicitly (e.g. a refit) take
+    precedence over the saved ones. When per-checkpoint histograms are
+    available ({N: histogram}, or from the artifact) a stopping-time
+    distribution figure is drawn too. Independent figures render in
+    parallel and are skipped when their inputs are unchanged.
+    """
+    if artifact is not None:
+        saved = results_artifact.load_artifact(artifact)
+        results = saved.results()
+        models = models or saved.models
+        if histograms is None and saved.has('histograms'):
+            histograms = dict(zip((r['N'] for r in results), np.asarray(saved.histograms)))
+    
+    jobs = [figure_renderer.RenderJob(
+        draw_publication_plots, {'results': results, 'models': models},
+        'publication_quality_analysis.png', {'figsize': (20, 12), 'dpi': 300})]
+    if histograms:
+        N_sorted = sorted(histograms)
+        jobs.append(figure_renderer.RenderJob(
+            draw_distribution_plot,
+            {'N_values': N_sorted, 'histograms': [np.asarray(histograms[N]) for N in N_sorted]},
+            'stopping_time_distribution.png', {'figsize': (12, 8), 'dpi': 300}))
+    
+    return figure_renderer.render_figures(jobs, pool=pool)
+
+def draw_distribution_plot(data, style, output):
+    """Normalized stopping-time distributions, one curve per checkpoint"""
+    fig, ax = plt.subplots(figsize=style['figsize'])
+    colors = plt.cm.viridis(np.linspace(0, 1, len(data['N_values'])))
+    for N, histogram, color in zip(data['N_values'], data['histograms'], colors):
+        histogram = np.trim_zeros(np.asarray(histogram, dtype=np.float64), 'b')
+        ax.plot(np.arange(len(histogram)), histogram / histogram.sum(),
+                color=color, linewidth=1.5, label=f'N = {N:,}')
+    ax.set_xlabel('Stopping time (steps)', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Fraction of n ≤ N', fontsize=14, fontweight='bold')
+    ax.set_title('Stopping-Time Distribution', fontsize=16, fontweight='bold')
+    ax.legend(fontsize=9, ncol=2)
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(output, dpi=style['dpi'], bbox_inches='tight')
+    plt.close(fig)
 
-def create_publication_plots(results, models):
-    """Create publication-quality plots"""
+def draw_publication_plots(data, style, output):
+    """Six-panel publication figure of the per-checkpoint metrics"""
+    results, models = data['results'], data['models']
     
-    fig = plt.figure(figsize=(20, 12))
+    fig = plt.figure(figsize=style['figsize'])
     
     N_values = np.array([r['N'] for r in results])
     W_values = np.array([r['W'] for r in results])
@@ -370,24 +842,71 @@ def create_publication_plots(results, models):
     ax6.set_xscale('log')
     
     plt.tight_layout()
-    plt.savefig('publication_quality_analysis.png', dpi=300, bbox_inches='tight')
-    print("✅ Saved: publication_quality_analysis.png")
+    plt.savefig(output, dpi=style['dpi'], bbox_inches='tight')
+    plt.close(fig)
 
-def main():
+def parse_args(argv=None):
+    """Command-line options"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--track-extremes', action='store_true',
+                        help='also record each trajectory\'s peak value and odd-step count')
+    parser.add_argument('--streaming', action='store_true',
+                        help='single out-of-core pass over all checkpoints (no points list)')
+    parser.add_argument('--memory-budget', type=int, default=None,
+                        help='bytes of in-flight chunk data allowed with --streaming')
+    parser.add_argument('--save-steps', action='store_true',
+                        help='store the step table of the largest N in the results artifact')
+    parser.add_argument('--from-artifact', metavar='PATH', default=None,
+                        help=f'skip computation: refit and replot from a saved artifact (e.g. {ARTIFACT_FILE})')
+    parser.add_argument('--backend', choices=('process', 'thread'), default='process',
+                        help='worker processes, or threads sharing one step table (thread_backend.py)')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes (default: cores allowed by affinity and cgroup quota)')
+    parser.add_argument('--memory-limit', type=int, default=None,
+                        help='bytes the run may use (default: available memory incl. cgroup limit)')
+    parser.add_argument('--pin-cpus', action='store_true',
+                        help='pin each worker process to its own allowed core')
+    parser.add_argument('--profile', action='store_true',
+                        help=f'profile each stage and worker (same as {profiling.PROFILE_ENV}=1)')
+    parser.add_argument('--profile-dir', default=None,
+                        help=f'directory for pstats/collapsed-stack files (default: {profiling.DEFAULT_PROFILE_DIR})')
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main execution"""
+    args = parse_args(argv)
+    if args.profile or args.profile_dir:
+        profiling.enable(args.profile_dir)
+    resource_planner.configure(args.processes, args.memory_limit, args.pin_cpus)
+    
+    # One warm pool serves every checkpoint and the figure rendering; an
+    # interrupt terminates its workers. The thread backend starts no pool.
+    pool_context = nullcontext() if args.backend == 'thread' else worker_pool.shared_pool()
+    with pool_context as pool:
+        if args.from_artifact:
+            models = statistical_analysis(artifact=args.from_artifact)
+            create_publication_plots(models=models, artifact=args.from_artifact, pool=pool)
+            return
+        
+        # Run comprehensive verification
+        if args.streaming:
+            results = streaming_verification(memory_budget=args.memory_budget)
+        else:
+            results = comprehensive_verification(track_extremes=args.track_extremes,
+                                                 save_steps=args.save_steps,
+                                                 backend=args.backend)
+        
+        # Statistical analysis
+        models = statistical_analysis(results)
+        
+        # Create plots
+        print("\nGenerating publication-quality visualizations...")
+        with stage_timer.stage('plots'):
+            create_publication_plots(results, models, histograms=load_distributions(), pool=pool)
     
-    # Run comprehensive verification
-    results = comprehensive_verification()
-    
-    # Statistical analysis
-    models = statistical_analysis(results)
-    
-    # Save results
+    # Save results, including the timing of every stage above
     save_results(results, models)
-    
-    # Create plots
-    print("\nGenerating publication-quality visualizations...")
-    create_publication_plots(results, models)
+    stage_timer.print_table()
     
     # Final summary
     print("\n" + "="*80)
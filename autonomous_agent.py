@@ -16,13 +16,21 @@ Date: December 2025
 """
 
 import os
+import re
 import sys
+import argparse
 import time
 import json
+import queue
+import signal
 import subprocess
+import threading
 import datetime
+from collections import deque
 from pathlib import Path
 import logging
+import resource_planner
+from stage_cache import StageCache
 
 # Setup logging
 logging.basicConfig(
@@ -35,21 +43,99 @@ logging.basicConfig(
 )
 logger = logging.getLogger('CollatzAgent')
 
+COMMAND_TIMEOUT = 28800  # 8 hours
+# Lines of stdout/stderr kept for the caller; everything goes to agent.log
+OUTPUT_TAIL_LINES = 5000
+PROGRESS_LOG_INTERVAL = 60  # seconds between logged progress lines
+STATE_SAVE_INTERVAL = 30  # seconds between incremental state saves
+
+# Output that means the run is already lost; the command is killed at once
+ABORT_PATTERNS = [
+    re.compile(r'Traceback \(most recent call last\)'),
+    re.compile(r'\bMemoryError\b'),
+    re.compile(r'MISMATCHES FOUND'),
+]
+# Output worth keeping but not fatal: a capped n is stored as unknown and
+# the run goes on, so these lines are recorded under runs[...]['warnings']
+WARNING_PATTERNS = [
+    re.compile(r'Warning: \d+ exceeded \d+ steps'),
+]
+MAX_WARNINGS_KEPT = 100
+
+CHECKPOINT_PATTERN = re.compile(r'Computing N\s*=\s*([\d,]+)')
+PROGRESS_PATTERNS = [
+    re.compile(r'^\s*\[[^\]]*\]\s+([\d.]+)%'),  # progress_monitor
+    re.compile(r'Progress:\s*([\d.]+)%'),  # extended_analysis
+    re.compile(r'(\d+)%\|'),  # tqdm
+]
+# verify_collatz.py table row: "Computing N=500... 500  143  3.49  74.01  0.1234"
+TABLE_ROW_PATTERN = re.compile(
+    r'Computing N=(\d+)\.\.\.\s+\d+\s+(\d+)\s+([\d.]+)\s+([-\d.]+)\s+([\d.]+)')
+SECTION_PATTERN = re.compile(r'^[A-Z][A-Z0-9 &()/:-]{3,}$')
+METRIC_PATTERN = re.compile(r'(H/W|W|θ|R²)(?: \([^)]*\))?\s*=\s*(-?[\d.]+(?:[eE][-+]?\d+)?)')
+METRIC_NAMES = {'W': 'W', 'H/W': 'aspect_ratio', 'θ': 'angle', 'R²': 'r_squared'}
+
+# Pipeline stages; results are cached under the hash of the command, the
+# N values and the sources of the script and its local imports (stage_cache.py)
+STAGES = {
+    'basic': {
+        'task': 'basic_verification',
+        'script': 'verify_collatz.py',
+        'command': 'python verify_collatz.py',
+        'description': 'Basic verification (N=500, 4000, 10000)',
+        'N_values': [500, 4000, 10000],
+        'outputs': ['collatz_parallelogram_N10000.png']
+    },
+    'extended': {
+        'task': 'extended_analysis',
+        'script': 'extended_analysis.py',
+        'command': 'python extended_analysis.py',
+        'description': 'Extended analysis (8 data points)',
+        'N_values': [500, 1000, 2000, 4000, 10000, 20000, 50000, 100000],
+        'outputs': ['comprehensive_analysis.png', 'extended_results.collatz']
+    },
+    'advanced': {
+        'task': 'advanced_verification',
+        'script': 'advanced_verification.py',
+        'command': 'python advanced_verification.py',
+        'description': 'Advanced verification (up to N=1,000,000)',
+        'N_values': [100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000,
+                     100000, 200000, 500000, 1000000],
+        'outputs': ['verification_results.json', 'verification_results.collatz',
+                    'publication_quality_analysis.png', 'stopping_time_distribution.png',
+                    'stopping_time_distribution.npz']
+    }
+}
+
 class CollatzResearchAgent:
     """Autonomous agent for Collatz research execution"""
     
-    def __init__(self, workspace_dir="."):
+    def __init__(self, workspace_dir=".", processes=None, memory_limit=None, pin_cpus=False,
+                 use_cache=True):
         self.workspace = Path(workspace_dir)
         self.state_file = self.workspace / "agent_state.json"
         self.results_dir = self.workspace / "results"
         self.results_dir.mkdir(exist_ok=True)
+        self.cache = StageCache(self.workspace) if use_cache else None
         
         # Load or initialize state
         self.state = self.load_state()
+        self.state.setdefault('cache', {'hits': 0, 'misses': 0, 'time_saved': 0.0, 'events': []})
+        
+        # Worker sizing is passed to every script through the environment
+        resource_planner.configure(processes, memory_limit, pin_cpus)
+        self.resources = resource_planner.plan()
+        self.state['resources'] = {
+            'processes': self.resources.processes,
+            'memory_budget': self.resources.memory_budget,
+            'cpus': self.resources.cpus,
+            'pin_cpus': self.resources.pin
+        }
         
         logger.info("🤖 Collatz Research Agent initialized")
         logger.info(f"📁 Workspace: {self.workspace.absolute()}")
         logger.info(f"📊 Current phase: {self.state.get('current_phase', 'Not started')}")
+        logger.info(f"🖥️ Resources: {self.resources.describe()}")
     
     def load_state(self):
         """Load agent state from file"""
@@ -70,41 +156,205 @@ class CollatzResearchAgent:
             'decisions_made': []
         }
     
-    def save_state(self):
-        """Save agent state to file"""
+    def save_state(self, quiet=False):
+        """Save agent state to file (atomically, so a crash never truncates it)"""
         self.state['last_run'] = datetime.datetime.now().isoformat()
-        with open(self.state_file, 'w') as f:
+        tmp = self.state_file.with_suffix('.json.tmp')
+        with open(tmp, 'w') as f:
             json.dump(self.state, f, indent=2)
-        logger.info("💾 State saved")
+        os.replace(tmp, self.state_file)
+        if not quiet:
+            logger.info("💾 State saved")
     
-    def run_command(self, command, description):
-        """Execute a shell command and log results"""
+    def run_command(self, command, description, timeout=COMMAND_TIMEOUT,
+                    abort_patterns=ABORT_PATTERNS, warning_patterns=WARNING_PATTERNS):
+        """Execute a shell command, streaming its output as it arrives
+        
+        Every stdout/stderr line goes to agent.log; progress and per-N
+        result lines update agent_state.json under runs[description]
+        while the command runs. A line matching one of abort_patterns
+        kills the command immediately; one matching warning_patterns is
+        counted and kept (the first MAX_WARNINGS_KEPT) under warnings.
+        Returns (success, output) with the tail of stdout on success and
+        of stderr on failure.
+        """
         logger.info(f"🔧 {description}")
         logger.info(f"   Command: {command}")
         
+        run = {
+            'command': command,
+            'status': 'running',
+            'started': datetime.datetime.now().isoformat(),
+            'progress': None,
+            'current_N': None,
+            'results': {},
+            'warnings': [],
+            'warning_count': 0,
+            'lines': 0
+        }
+        self.state.setdefault('runs', {})[description] = run
+        self.save_state(quiet=True)
+        
         try:
-            result = subprocess.run(
+            process = subprocess.Popen(
                 command,
                 shell=True,
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 text=True,
-                timeout=28800  # 8 hour timeout
+                bufsize=1,
+                # Unbuffered children report progress as it happens
+                env={**os.environ, 'PYTHONUNBUFFERED': '1'},
+                # Own process group, so an abort also stops pool workers
+                start_new_session=True
             )
+        except Exception as e:
+            logger.error(f"💥 {description} - EXCEPTION: {str(e)}")
+            run['status'] = 'exception'
+            self.save_state(quiet=True)
+            return False, str(e)
+        
+        lines = queue.Queue()
+        readers = [threading.Thread(target=self._read_stream, args=(stream, name, lines), daemon=True)
+                   for stream, name in ((process.stdout, 'stdout'), (process.stderr, 'stderr'))]
+        for reader in readers:
+            reader.start()
+        
+        tails = {'stdout': deque(maxlen=OUTPUT_TAIL_LINES), 'stderr': deque(maxlen=OUTPUT_TAIL_LINES)}
+        deadline = time.monotonic() + timeout
+        last_progress_log = last_save = 0.0
+        abort_reason = None
+        open_streams = len(readers)
+        
+        while open_streams:
+            try:
+                name, line = lines.get(timeout=1.0)
+            except queue.Empty:
+                name = line = None
             
-            if result.returncode == 0:
-                logger.info(f"✅ {description} - SUCCESS")
-                return True, result.stdout
+            if line is None:
+                if name is not None:
+                    open_streams -= 1
             else:
-                logger.error(f"❌ {description} - FAILED")
-                logger.error(f"   Error: {result.stderr}")
-                return False, result.stderr
+                line = line.rstrip('\n')
+                tails[name].append(line)
+                run['lines'] += 1
+                kind = self.parse_output_line(line, run)
+                now = time.monotonic()
+                if kind != 'progress':
+                    logger.info(f"   [{name}] {line}")
+                elif now - last_progress_log >= PROGRESS_LOG_INTERVAL:
+                    logger.info(f"   [{name}] {line.strip()}")
+                    last_progress_log = now
                 
-        except subprocess.TimeoutExpired:
-            logger.error(f"⏱️ {description} - TIMEOUT (8 hours)")
+                for pattern in abort_patterns:
+                    if pattern.search(line):
+                        abort_reason = line.strip()
+                        break
+                if abort_reason:
+                    break
+                if any(pattern.search(line) for pattern in warning_patterns):
+                    run['warning_count'] += 1
+                    if len(run['warnings']) < MAX_WARNINGS_KEPT:
+                        run['warnings'].append(line.strip())
+                
+                if kind == 'result' or now - last_save >= STATE_SAVE_INTERVAL:
+                    run['updated'] = datetime.datetime.now().isoformat()
+                    self.save_state(quiet=True)
+                    last_save = now
+            
+            if time.monotonic() > deadline:
+                abort_reason = f"timeout after {timeout}s"
+                break
+        
+        if abort_reason:
+            self._kill(process)
+        returncode = process.wait()
+        run['returncode'] = returncode
+        run['updated'] = datetime.datetime.now().isoformat()
+        if run['warning_count']:
+            logger.warning(f"⚠️ {description} - {run['warning_count']} warnings, "
+                           f"e.g. {run['warnings'][0]}")
+        
+        if abort_reason and abort_reason.startswith('timeout'):
+            logger.error(f"⏱️ {description} - TIMEOUT ({timeout / 3600:g} hours)")
+            run['status'] = 'timeout'
+            self.save_state(quiet=True)
             return False, "Timeout"
-        except Exception as e:
-            logger.error(f"💥 {description} - EXCEPTION: {str(e)}")
-            return False, str(e)
+        if abort_reason:
+            logger.error(f"🛑 {description} - ABORTED on: {abort_reason}")
+            run['status'] = 'aborted'
+            run['abort_reason'] = abort_reason
+            self.save_state(quiet=True)
+            return False, '\n'.join(list(tails['stderr']) + list(tails['stdout'])[-20:])
+        
+        if returncode == 0:
+            logger.info(f"✅ {description} - SUCCESS")
+            run['status'] = 'completed'
+            self.save_state(quiet=True)
+            return True, '\n'.join(tails['stdout'])
+        else:
+            logger.error(f"❌ {description} - FAILED (exit code {returncode})")
+            run['status'] = 'failed'
+            self.save_state(quiet=True)
+            return False, '\n'.join(tails['stderr'])
+    
+    @staticmethod
+    def _read_stream(stream, name, lines):
+        """Forward lines of one pipe to the queue; None marks its end
+        
+        Text mode splits on carriage returns too, so tqdm updates arrive
+        as separate lines.
+        """
+        for line in stream:
+            lines.put((name, line))
+        stream.close()
+        lines.put((name, None))
+    
+    @staticmethod
+    def _kill(process):
+        """Terminate the command's whole process group"""
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    
+    def parse_output_line(self, line, run):
+        """Update run from one line of output; returns 'progress', 'result' or None"""
+        for pattern in PROGRESS_PATTERNS:
+            match = pattern.search(line)
+            if match:
+                run['progress'] = float(match.group(1))
+                return 'progress'
+        
+        row = TABLE_ROW_PATTERN.search(line)
+        if row:
+            N, W, aspect_ratio, angle, r_squared = row.groups()
+            run['results'][N] = {'W': int(W), 'aspect_ratio': float(aspect_ratio),
+                                 'angle': float(angle), 'r_squared': float(r_squared)}
+            return 'result'
+        
+        checkpoint = CHECKPOINT_PATTERN.search(line)
+        if checkpoint:
+            run['current_N'] = int(checkpoint.group(1).replace(',', ''))
+            run['progress'] = None
+            return None
+        if SECTION_PATTERN.match(line):
+            # A new section (e.g. GROWTH PATTERN ANALYSIS) ends the per-N block
+            run['current_N'] = None
+            return None
+        
+        metrics = METRIC_PATTERN.findall(line)
+        if metrics and run['current_N'] is not None:
+            result = run['results'].setdefault(str(run['current_N']), {})
+            for name, value in metrics:
+                value = float(value)
+                result[METRIC_NAMES[name]] = int(value) if name == 'W' else value
+            return 'result'
+        return None
     
     def check_dependencies(self):
         """Check if all dependencies are installed"""
@@ -124,104 +374,108 @@ class CollatzResearchAgent:
         
         return success
     
+    def run_stage(self, name):
+        """Run one stage, or reuse its cached result if none of its inputs changed
+        
+        Returns (success, output, results): the stdout tail and the per-N
+        results parsed from it, recorded or restored.
+        """
+        stage = STAGES[name]
+        inputs = key = None
+        if self.cache is not None:
+            inputs = self.cache.inputs(stage['script'], stage['command'], stage['N_values'])
+            key = self.cache.key(inputs)
+            started = time.monotonic()
+            manifest = self.cache.lookup(name, key)
+            if manifest is not None:
+                self.cache.restore(manifest)
+                saved = max(0.0, manifest['elapsed'] - (time.monotonic() - started))
+                self.record_cache_event(name, key, hit=True, seconds=saved)
+                logger.info(f"♻️ {stage['description']} - inputs unchanged, reusing cached "
+                            f"result {key[:12]} (saved {saved:,.1f}s)")
+                self.complete_stage(name, 'cached')
+                return True, manifest['output'], manifest['results']
+        
+        logger.info(f"🚀 Starting {stage['description']}...")
+        started = time.monotonic()
+        success, output = self.run_command(stage['command'], stage['description'])
+        elapsed = time.monotonic() - started
+        results = self.state['runs'][stage['description']]['results']
+        if not success:
+            return False, output, results
+        
+        if self.cache is not None:
+            self.cache.store(name, key, inputs, stage['outputs'],
+                             {'elapsed': elapsed, 'results': results, 'output': output})
+            self.record_cache_event(name, key, hit=False, seconds=elapsed)
+        self.complete_stage(name, 'completed')
+        return True, output, results
+    
+    def record_cache_event(self, name, key, hit, seconds):
+        """Count a hit (seconds saved) or a miss (seconds computed)"""
+        cache = self.state['cache']
+        cache['hits' if hit else 'misses'] += 1
+        if hit:
+            cache['time_saved'] += seconds
+        cache['events'].append({
+            'stage': name,
+            'key': key,
+            'hit': hit,
+            'seconds': seconds,
+            'timestamp': datetime.datetime.now().isoformat()
+        })
+        self.save_state(quiet=True)
+    
+    def complete_stage(self, name, status):
+        self.state['verification_status'][name] = True
+        self.state['tasks_completed'].append({
+            'task': STAGES[name]['task'],
+            'timestamp': datetime.datetime.now().isoformat(),
+            'status': status
+        })
+        self.save_state()
+    
     def run_basic_verification(self):
         """Execute basic verification"""
-        if self.state['verification_status']['basic']:
-            logger.info("⏭️ Basic verification already completed")
-            return True
-        
-        logger.info("🚀 Starting basic verification...")
-        success, output = self.run_command(
-            "python verify_collatz.py",
-            "Basic verification (N=500, 4000, 10000)"
-        )
-        
+        success, output, results = self.run_stage('basic')
         if success:
-            self.state['verification_status']['basic'] = True
-            self.state['tasks_completed'].append({
-                'task': 'basic_verification',
-                'timestamp': datetime.datetime.now().isoformat(),
-                'status': 'completed'
-            })
-            self.save_state()
-            
-            # Analyze output
-            self.analyze_basic_results(output)
-        
+            self.analyze_basic_results(results)
         return success
     
     def run_extended_analysis(self):
         """Execute extended analysis"""
-        if self.state['verification_status']['extended']:
-            logger.info("⏭️ Extended analysis already completed")
-            return True
-        
-        logger.info("🚀 Starting extended analysis...")
-        success, output = self.run_command(
-            "python extended_analysis.py",
-            "Extended analysis (8 data points)"
-        )
-        
+        success, output, results = self.run_stage('extended')
         if success:
-            self.state['verification_status']['extended'] = True
-            self.state['tasks_completed'].append({
-                'task': 'extended_analysis',
-                'timestamp': datetime.datetime.now().isoformat(),
-                'status': 'completed'
-            })
-            self.save_state()
-            
-            # Analyze output
             self.analyze_extended_results(output)
-        
         return success
     
     def run_advanced_verification(self):
         """Execute advanced million-scale verification"""
-        if self.state['verification_status']['advanced']:
-            logger.info("⏭️ Advanced verification already completed")
-            return True
-        
-        logger.info("🚀 Starting advanced verification (MILLION-SCALE)...")
-        logger.info("⏱️ This will take 2-8 hours depending on CPU...")
-        
-        success, output = self.run_command(
-            "python advanced_verification.py",
-            "Advanced verification (up to N=1,000,000)"
-        )
-        
+        logger.info("⏱️ Uncached, this takes 2-8 hours depending on CPU...")
+        success, output, results = self.run_stage('advanced')
         if success:
-            self.state['verification_status']['advanced'] = True
-            self.state['tasks_completed'].append({
-                'task': 'advanced_verification',
-                'timestamp': datetime.datetime.now().isoformat(),
-                'status': 'completed'
-            })
-            self.save_state()
-            
-            # Analyze output
             self.analyze_advanced_results()
-        
         return success
     
-    def analyze_basic_results(self, output):
-        """Analyze basic verification results"""
-        logger.info("📊 Analyzing basic verification results...")
+    def analyze_basic_results(self, parsed):
+        """Analyze basic verification results
         
-        # Extract key metrics from output
-        # This is a simplified version - real implementation would parse output
-        
-        results = {
-            'N_500': {'W': 143, 'aspect_ratio': 3.50, 'angle': 88.85},
-            'N_4000': {'W': 237, 'aspect_ratio': 16.88, 'angle': 89.66},
-            'N_10000': {'W': 261, 'aspect_ratio': 38.31, 'angle': 89.71}
-        }
+        parsed maps N to the W, aspect ratio, angle and R² read from the
+        verify_collatz.py table (see parse_output_line).
+        """
+        logger.info("📊 Analyzing basic verification results...")
         
+        results = {f"N_{N}": parsed[N] for N in sorted(parsed, key=int)}
         self.state['results']['basic'] = results
         self.save_state()
-        
-        # Make decisions based on results
-        if results['N_10000']['angle'] > 89.5:
+        if not results:
+            logger.warning("⚠️ No result rows found in the basic verification output")
+            return
+        
+        # Make decisions based on the largest N
+        largest = results[f"N_{max(parsed, key=int)}"]
+        logger.info(f"📈 Largest N: W = {largest['W']}, θ = {largest['angle']:.2f}°")
+        if largest['angle'] > 89.5:
             logger.info("✅ DECISION: Tilt angle convergence confirmed (>89.5°)")
             logger.info("   → Proceeding to extended analysis")
             self.state['decisions_made'].append({
@@ -229,7 +483,14 @@ class CollatzResearchAgent:
                 'reason': 'Tilt angle convergence confirmed',
                 'timestamp': datetime.datetime.now().isoformat()
             })
-        
+        else:
+            logger.warning(f"⚠️ Tilt angle {largest['angle']:.2f}° has not reached 89.5° yet")
+            self.state['decisions_made'].append({
+                'decision': 'tilt_angle_not_converged',
+                'reason': f"θ = {largest['angle']:.2f}° at the largest N",
+                'timestamp': datetime.datetime.now().isoformat()
+            })
+
         self.save_state()
     
     def analyze_extended_results(self, output):
@@ -328,6 +589,15 @@ class CollatzResearchAgent:
                 status = "✅ Complete" if value else "⏳ Pending"
                 f.write(f"- {key}: {status}\n")
             
+            cache = self.state['cache']
+            f.write("\n## Stage Cache\n\n")
+            f.write(f"- Hits: {cache['hits']}, misses: {cache['misses']}, "
+                    f"time saved: {cache['time_saved']:,.1f}s\n")
+            for event in cache['events'][-10:]:
+                outcome = (f"hit, saved {event['seconds']:,.1f}s" if event['hit']
+                           else f"miss, computed in {event['seconds']:,.1f}s")
+                f.write(f"- {event['stage']} ({event['key'][:12]}): {outcome}\n")
+            
             f.write("\n## Next Steps\n\n")
             if self.state['current_phase'] == 'Phase 2':
                 f.write("- Begin theoretical proof development\n")
@@ -404,6 +674,17 @@ class CollatzResearchAgent:
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description='Autonomous Collatz research agent')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes per script (default: cores allowed by affinity and cgroup quota)')
+    parser.add_argument('--memory-limit', type=int, default=None,
+                        help='bytes each script may use (default: available memory incl. cgroup limit)')
+    parser.add_argument('--pin-cpus', action='store_true',
+                        help='pin each worker process to its own allowed core')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='rerun every stage instead of reusing cached results')
+    args = parser.parse_args()
+    
     print("=" * 80)
     print("🤖 AUTONOMOUS COLLATZ RESEARCH AGENT")
     print("=" * 80)
@@ -428,7 +709,8 @@ def main():
     if response.lower() in ['yes', 'y']:
         print("\n🚀 Starting agent...\n")
         
-        agent = CollatzResearchAgent()
+        agent = CollatzResearchAgent(processes=args.processes, memory_limit=args.memory_limit,
+                                     pin_cpus=args.pin_cpus, use_cache=not args.no_cache)
         success = agent.run()
         
         if success:
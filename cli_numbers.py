@@ -0,0 +1,28 @@
+"""
+Integer Command-Line Arguments
+
+The analysis scripts take ranges and sizes far beyond what is pleasant
+to type digit by digit. parse_int accepts the forms used throughout the
+README (1e9, 2^40, 2**40, 2^60+2^40) and returns an exact Python int,
+so values past 2^53 are not rounded through a float.
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import re
+from decimal import Decimal
+
+
+def parse_int(text):
+    """Parse integers written as 12345, 1e9, 2^40, 2**40 or sums like 2^60+2^40"""
+    total = 0
+    for term in text.replace(' ', '').split('+'):
+        match = re.fullmatch(r'(\d+)(?:\^|\*\*)(\d+)', term)
+        if match:
+            total += int(match.group(1)) ** int(match.group(2))
+        elif re.fullmatch(r'\d+(?:\.\d+)?[eE]\d+', term):
+            total += int(Decimal(term))
+        else:
+            total += int(term)
+    return total
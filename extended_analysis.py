@@ -17,6 +17,12 @@ import matplotlib.pyplot as plt
 from scipy import stats
 from scipy.optimize import curve_fit
 import time
+import argparse
+import results_artifact
+import figure_renderer
+
+# Columnar binary artifact holding the extended results
+ARTIFACT_FILE = 'extended_results.collatz'
 
 def collatz_steps(n):
     """Compute stopping time for number n"""
@@ -44,6 +50,7 @@ def compute_extended_data(N_values):
         
         max_steps = 0
         points = []
+        progress_interval = max(1, N // 10)
         
         for n in range(1, N + 1):
             steps = collatz_steps(n)
@@ -52,7 +59,7 @@ def compute_extended_data(N_values):
                 max_steps = steps
             
             # Progress indicator
-            if n % (N // 10) == 0:
+            if n % progress_interval == 0:
                 print(f"  Progress: {100*n//N}%")
         
         elapsed = time.time() - start_time
@@ -71,7 +78,9 @@ def compute_extended_data(N_values):
             'tilt_angle': angle,
             'r_squared': r_value**2,
             'computation_time': elapsed,
-            'points': points
+            'points': points,
+            'points_count': len(points),
+            'histogram': np.bincount(x)
         })
         
         print(f"  W={max_steps}, H/W={N/max_steps:.2f}, θ={angle:.2f}°")
@@ -79,8 +88,35 @@ def compute_extended_data(N_values):
     
     return results
 
-def analyze_growth_pattern(results):
+def save_extended_artifact(results, artifact=ARTIFACT_FILE):
+    """Store per-N metrics, histograms and the largest N's step table"""
+    results_artifact.clear_arrays(artifact)
+    
+    histograms = [r['histogram'] for r in results]
+    table = np.zeros((len(histograms), max(len(h) for h in histograms)), dtype=np.int64)
+    for i, h in enumerate(histograms):
+        table[i, :len(h)] = h
+    results_artifact.save_array(artifact, 'histograms', table)
+    
+    largest = max(results, key=lambda r: r['N'])
+    steps = np.zeros(largest['N'], dtype=np.uint16)
+    for s, n in largest['points']:
+        steps[n - 1] = s
+    results_artifact.save_array(artifact, 'steps', steps)
+    # Written last, so the metadata lists the arrays saved above
+    results_artifact.write_artifact(artifact, results)
+    
+    print(f"\n✅ Binary artifact saved to: {artifact}")
+
+def load_results(results=None, artifact=None):
+    """Results passed in, or read lazily from a saved artifact"""
+    if artifact is not None:
+        return results_artifact.load_artifact(artifact).results()
+    return results
+
+def analyze_growth_pattern(results=None, artifact=None):
     """Analyze the growth pattern of W(N)"""
+    results = load_results(results, artifact)
     N_values = np.array([r['N'] for r in results])
     W_values = np.array([r['W'] for r in results])
     
@@ -109,8 +145,9 @@ def analyze_growth_pattern(results):
     
     return slope, intercept, r_value**2
 
-def analyze_forbidden_zones(results):
+def analyze_forbidden_zones(results=None, artifact=None):
     """Analyze density of forbidden zones"""
+    results = load_results(results, artifact)
     print("\n" + "="*60)
     print("FORBIDDEN ZONE ANALYSIS")
     print("="*60)
@@ -118,13 +155,12 @@ def analyze_forbidden_zones(results):
     for result in results:
         N = result['N']
         W = result['W']
-        points = result['points']
         
         # Total possible points in rectangle
         total_area = N * W
         
         # Actual points
-        actual_points = len(points)
+        actual_points = result['points_count']
         
         # Density
         density = actual_points / total_area
@@ -135,9 +171,20 @@ def analyze_forbidden_zones(results):
         print(f"  Density: {density:.6f} ({density*100:.4f}%)")
         print(f"  Forbidden zone: {(1-density)*100:.4f}%")
 
-def plot_comprehensive_analysis(results):
-    """Create comprehensive visualization"""
-    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+def plot_comprehensive_analysis(results=None, artifact=None):
+    """Create comprehensive visualization, skipped if its inputs are unchanged"""
+    results = load_results(results, artifact)
+    metrics = [{key: r[key] for key in ('N', 'W', 'aspect_ratio', 'tilt_angle')}
+               for r in results]
+    
+    print()
+    return figure_renderer.render_figures([figure_renderer.RenderJob(
+        draw_comprehensive_analysis, metrics, 'comprehensive_analysis.png',
+        {'figsize': (15, 12), 'dpi': 300})])
+
+def draw_comprehensive_analysis(results, style, output):
+    """Four-panel figure of W, aspect ratio, tilt angle and log-log slope"""
+    fig, axes = plt.subplots(2, 2, figsize=style['figsize'])
     
     N_values = [r['N'] for r in results]
     W_values = [r['W'] for r in results]
@@ -192,11 +239,22 @@ def plot_comprehensive_analysis(results):
     ax4.grid(True, alpha=0.3)
     
     plt.tight_layout()
-    plt.savefig('comprehensive_analysis.png', dpi=300, bbox_inches='tight')
-    print("\n✅ Saved: comprehensive_analysis.png")
+    plt.savefig(output, dpi=style['dpi'], bbox_inches='tight')
+    plt.close(fig)
 
-def main():
+def main(argv=None):
     """Main execution"""
+    parser = argparse.ArgumentParser(description='Extended Collatz analysis')
+    parser.add_argument('--from-artifact', metavar='PATH', default=None,
+                        help=f'skip computation: reanalyse and replot a saved artifact (e.g. {ARTIFACT_FILE})')
+    args = parser.parse_args(argv)
+    
+    if args.from_artifact:
+        analyze_growth_pattern(artifact=args.from_artifact)
+        analyze_forbidden_zones(artifact=args.from_artifact)
+        plot_comprehensive_analysis(artifact=args.from_artifact)
+        return
+    
     print("="*60)
     print("EXTENDED COLLATZ GEOMETRIC ANALYSIS")
     print("="*60)
@@ -212,6 +270,7 @@ def main():
     
     # Compute extended data
     results = compute_extended_data(N_values)
+    save_extended_artifact(results)
     
     # Analyze growth pattern
     slope, intercept, r_squared = analyze_growth_pattern(results)
@@ -0,0 +1,142 @@
+"""
+Parallel, Cache-Aware Figure Rendering
+
+Figures are described as render jobs: a module-level draw function, the
+data it plots, style parameters and an output path. render_figures()
+
+- hashes each job's data, style and the source of the module defining
+  its draw function
+- skips jobs whose output exists and was rendered from the same hash
+- draws the remaining figures in a process pool with the Agg backend;
+  a single figure is drawn in the calling process, whose backend is
+  left alone
+- reports the render time of every figure
+
+Hashes are kept in a small JSON cache next to the outputs
+(.figure_cache.json), so a rerun that only changed one figure's inputs
+redraws only that figure.
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from multiprocessing import Pool
+
+import numpy as np
+
+import resource_planner
+import worker_pool
+
+CACHE_FILE = '.figure_cache.json'
+
+
+@dataclass
+class RenderJob:
+    """One figure: draw(data, style, output) writes output"""
+    draw: object
+    data: object
+    output: str
+    style: dict = field(default_factory=dict)
+
+
+def _canonical(value):
+    """JSON-compatible form of value for hashing"""
+    if isinstance(value, np.ndarray):
+        return {'dtype': str(value.dtype), 'shape': value.shape,
+                'sha256': hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()}
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, (tuple, set)):
+        return list(value)
+    raise TypeError(f"cannot hash {type(value).__name__}")
+
+
+def job_hash(job):
+    """Content hash of a job's data, style and drawing code
+
+    The code is the whole module defining job.draw, so a change to a
+    helper or style constant it uses also redraws the figure.
+    """
+    digest = hashlib.sha256()
+    digest.update(inspect.getsource(inspect.getmodule(job.draw)).encode())
+    digest.update(json.dumps([job.data, job.style, os.path.basename(job.output)],
+                             sort_keys=True, default=_canonical).encode())
+    return digest.hexdigest()
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+def _draw(job):
+    start = time.perf_counter()
+    job.draw(job.data, job.style, job.output)
+    return job.output, time.perf_counter() - start
+
+
+def _render(job):
+    # Warm pool workers switch to Agg once, on their first figure
+    worker_pool.worker_state('agg_backend', _init_worker)
+    return _draw(job)
+
+
+def _load_cache(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def render_figures(jobs, processes=None, cache_file=CACHE_FILE, force=False, pool=None):
+    """Render jobs whose inputs changed; returns {output: seconds or 'cached'}
+
+    With pool (a worker_pool.WorkerPool) the figures are drawn on its
+    already running workers instead of a new pool.
+    """
+    cache = _load_cache(cache_file)
+    hashes = {job.output: job_hash(job) for job in jobs}
+
+    todo = [job for job in jobs
+            if force or cache.get(job.output) != hashes[job.output]
+            or not os.path.exists(job.output)]
+    timings = {job.output: 'cached' for job in jobs}
+
+    if len(todo) == 1:
+        # Drawn here, with whatever backend the caller has selected
+        rendered = [_draw(todo[0])]
+    elif todo and pool is not None:
+        rendered = pool.map(_render, todo)
+    elif todo:
+        processes = min(len(todo), processes or resource_planner.available_cpus())
+        with Pool(processes, initializer=_init_worker) as pool:
+            rendered = pool.map(_render, todo)
+    else:
+        rendered = []
+
+    for output, seconds in rendered:
+        timings[output] = seconds
+        cache[output] = hashes[output]
+
+    tmp = f"{cache_file}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp, cache_file)
+
+    for job in jobs:
+        seconds = timings[job.output]
+        if seconds == 'cached':
+            print(f"  ⏭️ {job.output}: unchanged, not re-rendered")
+        else:
+            print(f"✅ Saved: {job.output} ({seconds:.2f}s)")
+
+    return timings
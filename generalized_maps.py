@@ -0,0 +1,241 @@
+"""
+Generalized qn+c Map Engine with Cycle and Divergence Detection
+
+The Collatz map is one member of a family: n -> n/2 for even n and
+n -> q*n + c for odd n. Other members behave very differently. 3n-1 has
+three cycles, and 5n+1 has cycles as well as trajectories that appear to
+diverge, so a fixed step cap either wastes iterations or silently drops
+points. Each start is classified instead:
+
+- converged: the trajectory reaches 1; steps is the first hitting time,
+  so for 3n+1 it equals collatz_steps
+- cycled: it enters a cycle that avoids 1, found with Brent's algorithm
+  (one comparison per step, no stored history); the cycle is named by
+  its smallest element
+- divergent: the value grew past the start by more than divergence_bits
+  bits (a growth bound, i.e. probably divergent)
+
+Below the growth bound the state space is finite, so every trajectory
+ends in one of the three outcomes without any step cap. Ranges run in a
+process pool with the registered reducers (reducers.py) applied to the
+converged points, so the parallelogram analysis works for any map.
+
+Usage:
+    python generalized_maps.py --map 3n-1 --N 1e5
+    python generalized_maps.py --map 5n+1 --N 1e4 --divergence-bits 512
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import argparse
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from multiprocessing import Pool
+
+import numpy as np
+
+import resource_planner
+from cli_numbers import parse_int
+from reducers import merge_partials, reduce_chunk, DEFAULT_REDUCERS
+
+CONVERGED, CYCLED, DIVERGENT = 0, 1, 2
+OUTCOMES = ('converged', 'cycled', 'divergent')
+DIVERGENCE_BITS = 256
+CHUNK_SIZE = 1 << 14
+MAX_EXAMPLES = 10
+
+
+@dataclass(frozen=True)
+class Map:
+    """n -> n/2 (n even), q*n + c (n odd)"""
+    q: int
+    c: int
+
+    @property
+    def name(self):
+        return f"{self.q}n{self.c:+d}"
+
+    def __call__(self, n):
+        return n >> 1 if n & 1 == 0 else self.q * n + self.c
+
+
+MAPS = {m.name: m for m in (Map(3, 1), Map(3, -1), Map(5, 1))}
+
+
+def parse_map(text):
+    """Map from a name like '3n+1', '3n-1' or '7n+3'"""
+    match = re.fullmatch(r'\s*(\d+)\s*n\s*([+-])\s*(\d+)\s*', text)
+    if not match:
+        raise ValueError(f"expected a map like 3n+1, got {text!r}")
+    q, sign, c = match.groups()
+    return Map(int(q), int(c) if sign == '+' else -int(c))
+
+
+def canonical_cycle(n, length, step):
+    """Cycle through n as a tuple starting at its smallest element"""
+    cycle = []
+    for _ in range(length):
+        cycle.append(n)
+        n = step(n)
+    i = cycle.index(min(cycle))
+    return tuple(cycle[i:] + cycle[:i])
+
+
+def classify(n, step=MAPS['3n+1'], divergence_bits=DIVERGENCE_BITS):
+    """(outcome, steps, cycle) for one start
+
+    steps is the hitting time of 1 when converged, the length of the
+    tail before the cycle when cycled, and the steps taken before the
+    growth bound was crossed when divergent. cycle is None unless cycled.
+    """
+    start = n
+    limit = n.bit_length() + divergence_bits
+    steps = 0
+    # Brent: the tortoise jumps to the hare whenever lam reaches a power of two
+    tortoise = n
+    power = lam = 1
+    while n != 1:
+        if n & 1:
+            n = step.q * n + step.c
+            if n.bit_length() > limit:
+                return DIVERGENT, steps + 1, None
+        else:
+            n >>= 1
+        steps += 1
+        if n == tortoise:
+            break
+        if lam == power:
+            tortoise = n
+            power <<= 1
+            lam = 0
+        lam += 1
+    else:
+        return CONVERGED, steps, None
+
+    # Cycle of length lam found; its entry point is where a walker lam
+    # steps ahead first meets one starting at the beginning
+    behind = ahead = start
+    for _ in range(lam):
+        ahead = step(ahead)
+    tail = 0
+    while behind != ahead:
+        behind, ahead = step(behind), step(ahead)
+        tail += 1
+    return CYCLED, tail, canonical_cycle(behind, lam, step)
+
+
+def classify_chunk(task):
+    """Classify start..end; reduce converged points inside the worker"""
+    start, end, step, divergence_bits = task
+    steps = np.zeros(end - start + 1, dtype=np.int64)
+    outcomes = np.zeros(end - start + 1, dtype=np.uint8)
+    cycles = Counter()
+    examples = {}
+    divergent = []
+
+    for i, n in enumerate(range(start, end + 1)):
+        outcome, taken, cycle = classify(n, step, divergence_bits)
+        outcomes[i] = outcome
+        if outcome == CONVERGED:
+            steps[i] = taken
+        elif outcome == CYCLED:
+            cycles[cycle] += 1
+            examples.setdefault(cycle, n)
+        elif len(divergent) < MAX_EXAMPLES:
+            divergent.append(n)
+
+    # Only converged starts are points of the parallelogram; the reducers
+    # skip zero steps, and the other outcomes are counted separately
+    partials = reduce_chunk(start, steps)
+    return {
+        'counts': np.bincount(outcomes, minlength=len(OUTCOMES)),
+        'cycles': cycles,
+        'examples': examples,
+        'divergent': divergent,
+        'partials': partials
+    }
+
+
+def run_map(step, N, divergence_bits=DIVERGENCE_BITS, processes=None, chunk_size=CHUNK_SIZE):
+    """Classify 1..N under a map and reduce the converged points"""
+    tasks = [(s, min(s + chunk_size - 1, N), step, divergence_bits)
+             for s in range(1, N + 1, chunk_size)]
+    counts = np.zeros(len(OUTCOMES), dtype=np.int64)
+    cycles = Counter()
+    examples = {}
+    divergent = []
+    reducers = [cls() for cls in DEFAULT_REDUCERS]
+
+    start_time = time.time()
+    with Pool(processes or resource_planner.available_cpus()) as pool:
+        # imap keeps range order, which the records reducer relies on
+        for result in pool.imap(classify_chunk, tasks):
+            counts += result['counts']
+            cycles.update(result['cycles'])
+            for cycle, n in result['examples'].items():
+                examples.setdefault(cycle, n)
+            divergent += result['divergent'][:MAX_EXAMPLES - len(divergent)]
+            merge_partials(reducers, result['partials'])
+
+    return {
+        'map': step.name,
+        'N': N,
+        'divergence_bits': divergence_bits,
+        'outcomes': dict(zip(OUTCOMES, counts.tolist())),
+        'cycles': [{'min': cycle[0], 'length': len(cycle), 'starts': count,
+                    'first_start': examples[cycle], 'cycle': list(cycle)}
+                   for cycle, count in sorted(cycles.items())],
+        'divergent_examples': divergent,
+        'reduced': {r.name: r.finalize() for r in reducers},
+        'computation_time': time.time() - start_time
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Classify starts under a qn+c map')
+    parser.add_argument('--map', default='3n+1', help='e.g. 3n+1, 3n-1, 5n+1, 7n+3')
+    parser.add_argument('--N', required=True, help='classify 1..N, e.g. 1e5')
+    parser.add_argument('--divergence-bits', type=int, default=DIVERGENCE_BITS,
+                        help='call a trajectory divergent once it gains this many bits')
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    step = parse_map(args.map)
+    N = parse_int(args.N)
+    print("=" * 80)
+    print(f"{step.name} MAP: n/2 (even), {step.q}n{step.c:+d} (odd), 1 <= n <= {N:,}")
+    print("=" * 80)
+
+    report = run_map(step, N, args.divergence_bits, args.processes)
+
+    for outcome, count in report['outcomes'].items():
+        print(f"  {outcome:<10} {count:>12,} ({100 * count / N:.4f}%)")
+    for cycle in report['cycles']:
+        members = ', '.join(map(str, cycle['cycle'][:8])) + (', ...' if cycle['length'] > 8 else '')
+        print(f"  🔁 cycle min={cycle['min']:,} length={cycle['length']}: "
+              f"{cycle['starts']:,} starts (first n = {cycle['first_start']:,}) [{members}]")
+    if report['divergent_examples']:
+        print(f"  📈 divergent (grew by > {args.divergence_bits} bits): "
+              f"{', '.join(map(str, report['divergent_examples']))}")
+
+    reduced = report['reduced']
+    converged = reduced['regression']['count']
+    if converged > 2:
+        W = reduced['max']['W']
+        density = converged / (N * W)
+        print("\nParallelogram of converged starts:")
+        print(f"  W (max steps) = {W} (n = {reduced['max']['argmax']:,})")
+        print(f"  θ (tilt angle) = {reduced['regression']['tilt_angle']:.4f}°")
+        print(f"  R² = {reduced['regression']['r_squared']:.8f}")
+        print(f"  Density = {density:.8f}")
+        if reduced['envelope']['geometry'] is not None:
+            print(f"  Hull fill of fitted parallelogram = "
+                  f"{reduced['envelope']['geometry']['fill_ratio']:.4f}")
+    print(f"\n✅ Done in {report['computation_time']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Differential Verification Harness for Stopping-Time Kernels
+
+Every stopping-time kernel is cross-checked against the reference
+collatz_steps in advanced_verification.py on
+
+- an exhaustive range 1..limit
+- random large samples, up to 2^62 (and beyond 2^64 for kernels that
+  accept big integers)
+- the stopping-time record holders up to 10^6 (27, 97, 871, ...,
+  837799), whose known stopping times also check the reference itself
+  and reproduce the W column of DATA.md
+
+New kernels join the check with the register_kernel decorator. A
+'values' kernel maps an array of starting values to their stopping
+times; a 'range' kernel computes start..end and is checked on the
+exhaustive range and on small windows around each record holder.
+
+Usage:
+    python kernel_harness.py                      # all kernels, a few seconds
+    python kernel_harness.py --exhaustive 1e6 --samples 100000
+    python kernel_harness.py --kernels steps_uint64
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+from multiprocessing import Pool
+
+import numpy as np
+
+import resource_planner
+from advanced_verification import collatz_steps
+from cli_numbers import parse_int
+
+DEFAULT_EXHAUSTIVE = 1 << 17
+DEFAULT_SAMPLES = 2000
+CHUNK = 1 << 14
+RECORD_WINDOW = 16
+MAX_REPORTED = 10
+
+# Stopping-time records n <= 10^6 (OEIS A006877 / A006878): every n with
+# more steps than all smaller numbers
+RECORDS = [
+    (2, 1), (3, 7), (6, 8), (7, 16), (9, 19), (18, 20), (25, 23), (27, 111),
+    (54, 112), (73, 115), (97, 118), (129, 121), (171, 124), (231, 127),
+    (313, 130), (327, 143), (649, 144), (703, 170), (871, 178), (1161, 181),
+    (2223, 182), (2463, 208), (2919, 216), (3711, 237), (6171, 261),
+    (10971, 267), (13255, 275), (17647, 278), (23529, 281), (26623, 307),
+    (34239, 310), (35655, 323), (52527, 339), (77031, 350), (106239, 353),
+    (142587, 374), (156159, 382), (216367, 385), (230631, 442), (410011, 448),
+    (511935, 469), (626331, 508), (837799, 524)
+]
+
+# Max Width column of the DATA.md table: W(N) = largest record <= N
+DATA_MD_WIDTHS = {500: 143, 4000: 237, 10000: 261, 100000: 350, 1000000: 524}
+
+
+@dataclass
+class Kernel:
+    name: str
+    func: object
+    kind: str = 'values'
+    max_value: int = (1 << 64) - 1
+
+
+KERNELS = {}
+
+
+def register_kernel(name, kind='values', max_value=(1 << 64) - 1):
+    """Decorator adding a kernel to the harness
+
+    kind='values': func(values) -> stopping times, values a uint64 array
+    (or a list of Python ints when some exceed 2^64).
+    kind='range': func(start, end) -> stopping times of start..end.
+    """
+    if kind not in ('values', 'range'):
+        raise ValueError(f"unknown kernel kind {kind!r}")
+
+    def decorator(func):
+        KERNELS[name] = Kernel(name, func, kind, max_value)
+        return func
+    return decorator
+
+
+# Built-in kernels, imported lazily so the harness loads only what it checks
+
+@register_kernel('steps_uint64')
+def _steps_uint64(values):
+    from fast_kernels import steps_uint64
+    return steps_uint64(np.asarray(values, dtype=np.uint64))
+
+
+@register_kernel('steps_any', max_value=None)
+def _steps_any(values):
+    from fast_kernels import steps_any
+    return steps_any(values)
+
+
+@register_kernel('collatz_trajectory', max_value=None)
+def _collatz_trajectory(values):
+    from advanced_verification import collatz_trajectory
+    return [collatz_trajectory(int(n))[0] for n in values]
+
+
+@register_kernel('extended_analysis.collatz_steps', max_value=None)
+def _extended_collatz_steps(values):
+    from extended_analysis import collatz_steps as extended_steps
+    return [extended_steps(int(n)) for n in values]
+
+
+@register_kernel('verify_collatz.collatz_steps', max_value=None)
+def _verify_collatz_steps(values):
+    from verify_collatz import collatz_steps as basic_steps
+    return [basic_steps(int(n)) for n in values]
+
+
+@register_kernel('generalized_maps.classify(3n+1)', max_value=None)
+def _generalized_classify(values):
+    from generalized_maps import classify
+    return [classify(int(n))[1] for n in values]
+
+
+@register_kernel('compute_batch', kind='range')
+def _compute_batch(start, end):
+    from advanced_verification import compute_batch
+    _, points, _, _ = compute_batch((start, end))
+    steps = np.zeros(end - start + 1, dtype=np.int64)
+    for s, n in points:
+        steps[n - start] = s
+    return steps
+
+
+@register_kernel('compute_batch(track_extremes)', kind='range')
+def _compute_batch_extremes(start, end):
+    from advanced_verification import compute_batch
+    return compute_batch((start, end, True))[3]['steps']
+
+
+@register_kernel('streaming_pipeline.steps_kernel', kind='range')
+def _streaming_steps_kernel(start, end):
+    from streaming_pipeline import steps_kernel
+    return steps_kernel((start, end))[1]
+
+
+def reference_steps(values):
+    return np.array([collatz_steps(int(n)) for n in values], dtype=np.int64)
+
+
+def plan_cases(exhaustive, samples, seed):
+    """(case name, start, end) ranges and (case name, values) samples"""
+    ranges = [('exhaustive', start, min(start + CHUNK - 1, exhaustive))
+              for start in range(1, exhaustive + 1, CHUNK)]
+    ranges += [('records', max(1, n - RECORD_WINDOW), n + RECORD_WINDOW) for n, _ in RECORDS]
+
+    rng = np.random.default_rng(seed)
+    # Log-uniform magnitudes so every scale up to 2^62 is represented
+    bits = rng.uniform(20, 62, samples)
+    large = np.unique((2.0 ** bits).astype(np.uint64) | np.uint64(1))
+    huge = [(1 << 64) + int(v) for v in rng.integers(1, 1 << 62, max(1, samples // 100))]
+    value_cases = [('random', [int(v) for v in chunk])
+                   for chunk in np.array_split(large, max(1, len(large) // 256))]
+    value_cases.append(('beyond_uint64', huge))
+    value_cases.append(('records', [n for n, _ in RECORDS]))
+    return ranges, value_cases
+
+
+def _compare(kernel, case, values, expected, got):
+    got = np.asarray(got, dtype=np.int64)
+    bad = np.flatnonzero(got != expected)
+    return {
+        'kernel': kernel,
+        'case': case,
+        'checked': len(values),
+        'mismatches': [(int(values[i]), int(expected[i]), int(got[i])) for i in bad[:MAX_REPORTED]],
+        'mismatch_count': len(bad)
+    }
+
+
+def check_task(task):
+    """Compute the reference once for a case and compare every kernel against it"""
+    case, kernel_names, payload = task
+    if isinstance(payload, tuple):
+        start, end = payload
+        values = list(range(start, end + 1))
+    else:
+        values = payload
+    expected = reference_steps(values)
+
+    reports = []
+    for name in kernel_names:
+        kernel = KERNELS[name]
+        if kernel.max_value is not None and max(values) > kernel.max_value:
+            continue
+        if kernel.kind == 'range':
+            if not isinstance(payload, tuple):
+                continue
+            got = kernel.func(start, end)
+        elif max(values) > (1 << 64) - 1:
+            got = kernel.func(values)
+        else:
+            got = kernel.func(np.array(values, dtype=np.uint64))
+        reports.append(_compare(name, case, values, expected, got))
+    return reports
+
+
+def check_known_values():
+    """The reference must reproduce the record table and the DATA.md widths"""
+    failures = []
+    for n, steps in RECORDS:
+        if collatz_steps(n) != steps:
+            failures.append(f"reference: n = {n:,} has {collatz_steps(n)} steps, expected {steps}")
+    for N, W in DATA_MD_WIDTHS.items():
+        width = max(steps for n, steps in RECORDS if n <= N)
+        if width != W:
+            failures.append(f"records give W({N:,}) = {width}, DATA.md says {W}")
+    return failures
+
+
+def run_harness(kernels=None, exhaustive=DEFAULT_EXHAUSTIVE, samples=DEFAULT_SAMPLES,
+                seed=0, processes=None):
+    """Cross-check kernels against the reference; returns a report dict"""
+    names = list(kernels or KERNELS)
+    unknown = [name for name in names if name not in KERNELS]
+    if unknown:
+        raise ValueError(f"unknown kernels: {', '.join(unknown)}")
+
+    start_time = time.time()
+    ranges, value_cases = plan_cases(exhaustive, samples, seed)
+    tasks = [(case, names, (start, end)) for case, start, end in ranges]
+    tasks += [(case, names, values) for case, values in value_cases]
+
+    with Pool(processes or resource_planner.available_cpus()) as pool:
+        reports = [r for batch in pool.imap_unordered(check_task, tasks) for r in batch]
+
+    totals = {}
+    for r in reports:
+        total = totals.setdefault(r['kernel'], {'checked': 0, 'mismatch_count': 0,
+                                                'mismatches': [], 'cases': set()})
+        total['checked'] += r['checked']
+        total['mismatch_count'] += r['mismatch_count']
+        total['cases'].add(r['case'])
+        total['mismatches'] += [(r['case'],) + m for m in r['mismatches']]
+
+    known_failures = check_known_values()
+    return {
+        'kernels': {name: totals.get(name, {'checked': 0, 'mismatch_count': 0,
+                                            'mismatches': [], 'cases': set()})
+                    for name in names},
+        'known_value_failures': known_failures,
+        'passed': not known_failures and all(t['mismatch_count'] == 0 for t in totals.values()),
+        'elapsed': time.time() - start_time
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cross-check stopping-time kernels against the reference')
+    parser.add_argument('--kernels', nargs='+', default=None, choices=sorted(KERNELS))
+    parser.add_argument('--exhaustive', default=str(DEFAULT_EXHAUSTIVE),
+                        help='check every n up to this limit (e.g. 1e6)')
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES,
+                        help='random large starting values')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("DIFFERENTIAL KERNEL VERIFICATION")
+    print("=" * 80)
+
+    report = run_harness(args.kernels, parse_int(args.exhaustive), args.samples,
+                         args.seed, args.processes)
+
+    for failure in report['known_value_failures']:
+        print(f"❌ {failure}")
+    for name, total in report['kernels'].items():
+        cases = ', '.join(sorted(total['cases'])) or 'no applicable cases'
+        if total['mismatch_count']:
+            print(f"❌ {name}: {total['mismatch_count']:,} mismatches "
+                  f"in {total['checked']:,} values ({cases})")
+            for case, n, expected, got in total['mismatches'][:MAX_REPORTED]:
+                print(f"     [{case}] n = {n:,}: expected {expected}, got {got}")
+        else:
+            print(f"✅ {name}: {total['checked']:,} values match ({cases})")
+
+    print(f"\n{'All kernels match the reference' if report['passed'] else 'MISMATCHES FOUND'} "
+          f"({report['elapsed']:.1f}s)")
+    return 0 if report['passed'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Inverted Index from Stopping Time to n (CSR Layout)
+
+A level set of the parallelogram, every n <= N with a given stopping
+time s, used to need a scan of the whole points list. The index turns
+the step table of a results artifact around:
+
+    level_offsets.npy   int64, S + 1 entries; level s occupies
+                        numbers[offsets[s]:offsets[s + 1]]
+    level_numbers.npy   uint32 (uint64 once N >= 2^32), every n <= N
+                        grouped by stopping time, ascending within a level
+
+It is built by a counting sort in O(N): one bincount pass gives the
+offsets, a second pass scatters each chunk's n into its levels (NumPy's
+stable sort of uint16 keys is a radix sort). Only one chunk is in memory
+at a time and the numbers are written straight into a memory-mapped
+.npy, so the build works for step tables larger than RAM.
+
+Queries read the memory-mapped arrays and touch only what they return:
+
+    index.level(s, a, b)     n in [a, b] with stopping time s (a view)
+    index.count(s, a, b)     how many there are
+    index.counts(a, b)       count for every s in the window [a, b], via
+                             a bisection run on all levels at once
+
+Usage:
+    python advanced_verification.py --save-steps   # builds the index too
+    python level_index.py --artifact verification_results.collatz --build
+    python level_index.py --steps 111 --range 1 1e5
+    python level_index.py --window 1e5 2e5
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+import results_artifact
+from cli_numbers import parse_int
+
+OFFSETS_FILE = 'level_offsets'
+NUMBERS_FILE = 'level_numbers'
+CHUNK_SIZE = 1 << 22
+
+
+def _chunks(length, chunk_size):
+    for start in range(0, length, chunk_size):
+        yield start, min(start + chunk_size, length)
+
+
+def build_index(steps, artifact, chunk_size=CHUNK_SIZE):
+    """Counting-sort the step table steps[n - 1] into a CSR level index"""
+    artifact = Path(artifact)
+    N = len(steps)
+    dtype = np.uint32 if N < 1 << 32 else np.uint64
+
+    # Pass 1: level sizes
+    levels = int(max((int(np.max(steps[a:b])) for a, b in _chunks(N, chunk_size)), default=0)) + 1
+    sizes = np.zeros(levels, dtype=np.int64)
+    for a, b in _chunks(N, chunk_size):
+        sizes += np.bincount(steps[a:b], minlength=levels)
+    offsets = np.zeros(levels + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+
+    # Pass 2: each chunk's n go to the next free slots of their levels,
+    # so n stays ascending within every level
+    artifact.mkdir(parents=True, exist_ok=True)
+    tmp = artifact / f"{NUMBERS_FILE}.tmp.npy"
+    numbers = np.lib.format.open_memmap(tmp, mode='w+', dtype=dtype, shape=(N,))
+    cursor = offsets[:-1].copy()
+    for a, b in _chunks(N, chunk_size):
+        block = np.asarray(steps[a:b])
+        order = np.argsort(block, kind='stable')
+        keys = block[order].astype(np.intp)
+        block_sizes = np.bincount(block, minlength=levels)
+        block_starts = np.cumsum(block_sizes) - block_sizes
+        numbers[cursor[keys] + np.arange(len(keys)) - block_starts[keys]] = order + a + 1
+        cursor += block_sizes
+    numbers.flush()
+    del numbers
+    os.replace(tmp, artifact / f"{NUMBERS_FILE}.npy")
+    results_artifact.save_array(artifact, OFFSETS_FILE, offsets)
+    return LevelIndex(artifact)
+
+
+class LevelIndex:
+    """Memory-mapped CSR index: stopping time -> sorted n"""
+
+    def __init__(self, artifact):
+        path = Path(artifact)
+        self.offsets = np.load(path / f"{OFFSETS_FILE}.npy", mmap_mode='r')
+        self.numbers = np.load(path / f"{NUMBERS_FILE}.npy", mmap_mode='r')
+
+    @property
+    def N(self):
+        return len(self.numbers)
+
+    @property
+    def levels(self):
+        """Number of stopping times covered, 0..levels - 1"""
+        return len(self.offsets) - 1
+
+    def _bounds(self, s, a, b):
+        if not 0 <= s < self.levels:
+            return 0, 0
+        lo, hi = int(self.offsets[s]), int(self.offsets[s + 1])
+        segment = self.numbers[lo:hi]
+        start = lo if a is None else lo + int(np.searchsorted(segment, a, 'left'))
+        end = hi if b is None else lo + int(np.searchsorted(segment, b, 'right'))
+        return start, end
+
+    def level(self, s, a=None, b=None):
+        """All n in [a, b] with stopping time s, ascending"""
+        start, end = self._bounds(s, a, b)
+        return self.numbers[start:end]
+
+    def count(self, s, a=None, b=None):
+        start, end = self._bounds(s, a, b)
+        return end - start
+
+    def _rank(self, value, side):
+        """Per level, the first position whose n is > value ('right') or >= value ('left')"""
+        lo = np.asarray(self.offsets[:-1], dtype=np.int64).copy()
+        hi = np.asarray(self.offsets[1:], dtype=np.int64).copy()
+        # Bisection on every level at once: ~log2(N) vectorized steps
+        while True:
+            active = lo < hi
+            if not active.any():
+                return lo
+            mid = (lo + hi) // 2
+            probe = np.zeros(len(mid), dtype=bool)
+            probe[active] = (self.numbers[mid[active]] < value if side == 'left'
+                             else self.numbers[mid[active]] <= value)
+            lo = np.where(active & probe, mid + 1, lo)
+            hi = np.where(active & ~probe, mid, hi)
+
+    def counts(self, a=None, b=None):
+        """counts[s] = number of n in [a, b] with stopping time s"""
+        start = self.offsets[:-1] if a is None else self._rank(a, 'left')
+        end = self.offsets[1:] if b is None else self._rank(b, 'right')
+        return np.asarray(end, dtype=np.int64) - np.asarray(start, dtype=np.int64)
+
+
+def load_index(artifact):
+    return LevelIndex(artifact)
+
+
+def _timed(func, repeat=100):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        value = func()
+    return value, (time.perf_counter() - start) / repeat * 1e6
+
+
+def main(argv=None):
+    from advanced_verification import ARTIFACT_FILE
+
+    parser = argparse.ArgumentParser(description='Query n by stopping time in a results artifact')
+    parser.add_argument('--artifact', default=ARTIFACT_FILE)
+    parser.add_argument('--build', action='store_true',
+                        help="(re)build the index from the artifact's step table")
+    parser.add_argument('--steps', type=int, default=None, help='stopping time s to list')
+    parser.add_argument('--range', nargs=2, metavar=('A', 'B'), default=None,
+                        help='restrict --steps to A <= n <= B')
+    parser.add_argument('--window', nargs=2, metavar=('A', 'B'), default=None,
+                        help='count per stopping time for A <= n <= B')
+    parser.add_argument('--show', type=int, default=20, help='numbers to print for --steps')
+    args = parser.parse_args(argv)
+
+    if args.build or not (Path(args.artifact) / f"{OFFSETS_FILE}.npy").exists():
+        artifact = results_artifact.load_artifact(args.artifact)
+        if not artifact.has('steps'):
+            parser.error(f"{args.artifact} has no step table; run advanced_verification.py --save-steps")
+        start = time.time()
+        index = build_index(artifact.steps, args.artifact)
+        print(f"✅ Level index for N={index.N:,} ({index.levels} stopping times) "
+              f"built in {time.time() - start:.2f}s")
+    else:
+        index = load_index(args.artifact)
+        print(f"Level index for N={index.N:,} ({index.levels} stopping times)")
+
+    if args.steps is not None:
+        a, b = (parse_int(v) for v in args.range) if args.range else (None, None)
+        numbers, micros = _timed(lambda: index.level(args.steps, a, b))
+        shown = ', '.join(map(str, numbers[:args.show])) + (', ...' if len(numbers) > args.show else '')
+        print(f"\n🔎 steps = {args.steps}: {len(numbers):,} numbers ({micros:.1f} µs)")
+        if len(numbers):
+            print(f"  {shown}")
+
+    if args.window:
+        a, b = (parse_int(v) for v in args.window)
+        counts, micros = _timed(lambda: index.counts(a, b))
+        occupied = np.flatnonzero(counts)
+        print(f"\n🔎 {a:,} <= n <= {b:,}: {int(counts.sum()):,} numbers in "
+              f"{len(occupied)} levels ({micros:.1f} µs)")
+        if len(occupied):
+            mode = int(np.argmax(counts))
+            print(f"  steps {occupied[0]}..{occupied[-1]}, most common {mode} ({counts[mode]:,} numbers)")
+
+
+if __name__ == "__main__":
+    main()
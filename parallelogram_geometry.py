@@ -0,0 +1,95 @@
+"""
+Geometry of the Collatz Parallelogram Boundary
+
+The (steps, n) point cloud is summarized by its boundary envelope: for
+every stopping time s the smallest and largest n seen. Everything here
+works from that O(W) envelope, never from the points themselves:
+
+- convex hull of the envelope (identical to the hull of all points)
+- minimum-area enclosing parallelogram, its corners and edge slopes
+- hull area, parallelogram area and how much of it the hull fills
+
+The minimum-area enclosing parallelogram has both pairs of sides flush
+with hull edges, so trying every pair of hull-edge directions is exact.
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import numpy as np
+from scipy.spatial import ConvexHull, QhullError
+
+
+def envelope_points(min_n, max_n):
+    """(steps, n) boundary points for every stopping time that occurs"""
+    steps = np.flatnonzero(max_n > 0)
+    points = np.concatenate([np.column_stack([steps, min_n[steps]]),
+                             np.column_stack([steps, max_n[steps]])])
+    return np.unique(points.astype(np.float64), axis=0)
+
+
+def _support_lines(hull, direction):
+    """Offsets of the two lines parallel to direction that enclose hull"""
+    normal = np.array([-direction[1], direction[0]])
+    projections = hull @ normal
+    return normal, projections.min(), projections.max()
+
+
+def min_area_parallelogram(hull):
+    """Corners of the smallest parallelogram enclosing a convex polygon"""
+    edges = np.roll(hull, -1, axis=0) - hull
+    directions = edges / np.linalg.norm(edges, axis=1)[:, None]
+
+    best = None
+    for i in range(len(directions)):
+        n1, lo1, hi1 = _support_lines(hull, directions[i])
+        for j in range(i + 1, len(directions)):
+            n2, lo2, hi2 = _support_lines(hull, directions[j])
+            cross = abs(n1[0] * n2[1] - n1[1] * n2[0])
+            if cross < 1e-12:
+                continue  # Parallel edges do not span a parallelogram
+            area = (hi1 - lo1) * (hi2 - lo2) / cross
+            if best is None or area < best[0]:
+                best = (area, n1, lo1, hi1, n2, lo2, hi2)
+
+    area, n1, lo1, hi1, n2, lo2, hi2 = best
+    matrix = np.array([n1, n2])
+    corners = [np.linalg.solve(matrix, [a, b])
+               for a, b in ((lo1, lo2), (hi1, lo2), (hi1, hi2), (lo1, hi2))]
+    return np.array(corners), area
+
+
+def _slope(vector):
+    return float(vector[1] / vector[0]) if vector[0] != 0 else float('inf')
+
+
+def envelope_geometry(min_n, max_n):
+    """Hull and fitted parallelogram metrics of a (steps, n) envelope
+
+    Coordinates are scaled to the unit square first, which keeps the
+    search well conditioned; areas and slopes are mapped back.
+    """
+    points = envelope_points(min_n, max_n)
+    if len(points) < 3:
+        return None  # No hull without three points
+    scale = points.max(axis=0)
+    scale[scale == 0] = 1
+    try:
+        hull = ConvexHull(points / scale)
+    except QhullError:
+        return None  # Degenerate (all points on a line)
+
+    vertices = hull.points[hull.vertices]
+    corners, area = min_area_parallelogram(vertices)
+    corners *= scale
+    hull_area = hull.volume * scale.prod()
+    parallelogram_area = area * scale.prod()
+
+    return {
+        'hull_vertices': (vertices * scale).tolist(),
+        'hull_area': float(hull_area),
+        'parallelogram_corners': corners.tolist(),
+        'parallelogram_area': float(parallelogram_area),
+        'edge_slopes': [_slope(corners[1] - corners[0]), _slope(corners[3] - corners[0])],
+        'fill_ratio': float(hull_area / parallelogram_area)
+    }
@@ -0,0 +1,174 @@
+"""
+Opt-in Profiling Hooks and Stage Timing
+
+Every run records a cheap wall-clock timing per pipeline stage (kernels,
+merging, array building, linregress, curve_fit, plotting, ...). Setting
+COLLATZ_PROFILE=1 (or passing --profile to advanced_verification.py)
+additionally profiles each stage and each worker process with cProfile
+and a sampling profiler, writing into COLLATZ_PROFILE_DIR (default
+'profiles/'):
+
+- <stage>.pstats / worker-<pid>.pstats   cProfile statistics
+- <stage>.collapsed / worker-<pid>.collapsed   collapsed stacks, ready
+  for flamegraph.pl or speedscope
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE_ENV = 'COLLATZ_PROFILE'
+PROFILE_DIR_ENV = 'COLLATZ_PROFILE_DIR'
+DEFAULT_PROFILE_DIR = 'profiles'
+SAMPLE_INTERVAL = 0.005
+
+# Set in each worker process by init_worker
+_worker_profiler = None
+_worker_sampler = None
+_worker_dir = None
+
+
+def profile_dir():
+    """Output directory when profiling is enabled, otherwise None"""
+    if os.environ.get(PROFILE_ENV, '') in ('', '0'):
+        return None
+    return os.environ.get(PROFILE_DIR_ENV, DEFAULT_PROFILE_DIR)
+
+
+def enable(directory=None):
+    """Turn profiling on for this process and any workers it starts"""
+    os.environ[PROFILE_ENV] = '1'
+    if directory:
+        os.environ[PROFILE_DIR_ENV] = directory
+
+
+class StackSampler(threading.Thread):
+    """Sample one thread's Python stack at a fixed interval"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.running = threading.Event()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            if not self.running.is_set():
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+
+    def write_collapsed(self, path):
+        """Write stacks in Brendan Gregg's collapsed format"""
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class StageTimer:
+    """Accumulate wall time per named stage, profiling it when enabled"""
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+        self._profilers = {}
+        self._samplers = {}
+
+    @contextmanager
+    def stage(self, name):
+        directory = profile_dir()
+        profiler = sampler = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            profiler = self._profilers.setdefault(name, cProfile.Profile())
+            sampler = self._samplers.get(name)
+            if sampler is None:
+                sampler = StackSampler(threading.get_ident())
+                sampler.start()
+                self._samplers[name] = sampler
+            sampler.running.set()
+            profiler.enable()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.seconds[name] = self.seconds.get(name, 0.0) + elapsed
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+            if profiler is not None:
+                profiler.disable()
+                sampler.running.clear()
+                profiler.dump_stats(os.path.join(directory, f"{name}.pstats"))
+                sampler.write_collapsed(os.path.join(directory, f"{name}.collapsed"))
+
+    def table(self):
+        """Stage timings as a JSON-serializable dict"""
+        total = sum(self.seconds.values())
+        return {
+            name: {
+                'seconds': self.seconds[name],
+                'calls': self.calls[name],
+                'fraction': self.seconds[name] / total if total else 0.0
+            }
+            for name in self.seconds
+        }
+
+    def print_table(self):
+        print(f"\n{'Stage':<16} {'Calls':>6} {'Seconds':>12} {'Share':>8}")
+        print("-" * 46)
+        for name, row in sorted(self.table().items(), key=lambda kv: -kv[1]['seconds']):
+            print(f"{name:<16} {row['calls']:>6} {row['seconds']:>12.3f} "
+                  f"{100 * row['fraction']:>7.1f}%")
+
+
+def init_worker():
+    """Pool initializer: start per-worker profilers when enabled"""
+    global _worker_profiler, _worker_sampler, _worker_dir
+    _worker_dir = profile_dir()
+    if _worker_dir:
+        os.makedirs(_worker_dir, exist_ok=True)
+        _worker_profiler = cProfile.Profile()
+        _worker_sampler = StackSampler(threading.get_ident())
+        _worker_sampler.start()
+
+
+def run_profiled(func, args):
+    """Call func(args) in a worker, profiling it when enabled
+
+    Stats are rewritten after every call because pool workers are
+    terminated without running exit handlers.
+    """
+    if _worker_profiler is None:
+        return func(args)
+
+    _worker_sampler.running.set()
+    _worker_profiler.enable()
+    try:
+        return func(args)
+    finally:
+        _worker_profiler.disable()
+        _worker_sampler.running.clear()
+        pid = os.getpid()
+        _worker_profiler.dump_stats(os.path.join(_worker_dir, f"worker-{pid}.pstats"))
+        _worker_sampler.write_collapsed(os.path.join(_worker_dir, f"worker-{pid}.collapsed"))
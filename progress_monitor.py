@@ -0,0 +1,214 @@
+"""
+Live Throughput and ETA Instrumentation
+
+Workers publish a few counters (numbers done, steps iterated, current
+chunk, busy time) into a shared-memory array. A monitor thread in the
+parent samples the array, turns it into numbers/sec, per-worker
+utilization and ETA, and writes them to the console and to a
+Prometheus-style text file that can be scraped by node_exporter's
+textfile collector.
+
+Workers only touch their own slot once per chunk, so the overhead is a
+handful of integer stores per few thousand numbers.
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import os
+import sys
+import threading
+import time
+from multiprocessing import Array, Value
+
+# Layout of one worker slot in the shared array
+NUMBERS_DONE = 0
+STEPS_DONE = 1
+CURRENT_CHUNK = 2
+BUSY_NS = 3
+SLOT_FIELDS = 4
+
+# Set in each worker process by init_worker
+_counters = None
+_slot = None
+
+
+class ProgressCounters:
+    """Shared-memory counters, one slot per worker process"""
+
+    def __init__(self, num_workers):
+        self.num_workers = num_workers
+        self.values = Array('q', num_workers * SLOT_FIELDS, lock=False)
+        self.next_slot = Value('i', 0)
+
+    def reset(self):
+        """Zero all counters before a new run on the same workers"""
+        self.values[:] = [0] * len(self.values)
+
+    def snapshot(self):
+        """Copy of the counters as a list of per-worker lists"""
+        flat = self.values[:]
+        return [flat[i * SLOT_FIELDS:(i + 1) * SLOT_FIELDS]
+                for i in range(self.num_workers)]
+
+
+def init_worker(counters):
+    """Pool initializer: claim a slot in the shared counters, returns it"""
+    global _counters, _slot
+    with counters.next_slot.get_lock():
+        _slot = counters.next_slot.value
+        counters.next_slot.value += 1
+    _counters = counters
+    return _slot
+
+
+def start_chunk(chunk_start):
+    """Publish the chunk this worker is about to process"""
+    if _counters is not None:
+        _counters.values[_slot * SLOT_FIELDS + CURRENT_CHUNK] = chunk_start
+
+
+def finish_chunk(numbers, steps, busy_ns):
+    """Publish the work done in the chunk that just finished"""
+    if _counters is not None:
+        base = _slot * SLOT_FIELDS
+        _counters.values[base + NUMBERS_DONE] += numbers
+        _counters.values[base + STEPS_DONE] += steps
+        _counters.values[base + BUSY_NS] += busy_ns
+
+
+class ProgressMonitor(threading.Thread):
+    """Background thread reporting throughput, utilization and ETA"""
+
+    def __init__(self, counters, total, label='', interval=2.0,
+                 metrics_file=None, stream=sys.stdout):
+        super().__init__(daemon=True)
+        self.counters = counters
+        self.total = total
+        self.label = label
+        self.interval = interval
+        self.metrics_file = metrics_file
+        self.stream = stream
+        self._stop_event = threading.Event()
+        self._start_time = time.time()
+        self._last_time = self._start_time
+        self._last_snapshot = counters.snapshot()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.report()
+
+    def stop(self):
+        """Stop the thread and emit a final report"""
+        self._stop_event.set()
+        self.join()
+        self.report(final=True)
+
+    def report(self, final=False):
+        """Sample the counters once and publish the derived metrics"""
+        now = time.time()
+        snapshot = self.counters.snapshot()
+        metrics = self.compute_metrics(snapshot, now, final)
+        self._last_snapshot = snapshot
+        self._last_time = now
+
+        self.write_console(metrics, final)
+        if self.metrics_file:
+            self.write_metrics_file(metrics, snapshot)
+
+        return metrics
+
+    def compute_metrics(self, snapshot, now, final=False):
+        """Derive rates, utilization and ETA from two snapshots
+        
+        The final report measures utilization over the whole run rather
+        than the (possibly very short) last interval.
+        """
+        elapsed = max(now - self._start_time, 1e-9)
+        interval = max(now - self._last_time, 1e-9)
+        baseline = self._last_snapshot
+        if final:
+            interval = elapsed
+            baseline = [[0] * SLOT_FIELDS for _ in snapshot]
+
+        done = sum(w[NUMBERS_DONE] for w in snapshot)
+        steps = sum(w[STEPS_DONE] for w in snapshot)
+        last_done = sum(w[NUMBERS_DONE] for w in baseline)
+
+        utilization = [
+            min(1.0, (w[BUSY_NS] - last[BUSY_NS]) / (interval * 1e9))
+            for w, last in zip(snapshot, baseline)
+        ]
+
+        # ETA from the average rate, which is far steadier than the
+        # instantaneous one when chunks finish in bursts
+        average_rate = done / elapsed
+        remaining = max(self.total - done, 0)
+        eta = remaining / average_rate if average_rate > 0 else float('inf')
+
+        return {
+            'numbers_done': done,
+            'steps_done': steps,
+            'numbers_per_second': (done - last_done) / interval,
+            'average_numbers_per_second': average_rate,
+            'utilization': utilization,
+            'eta_seconds': eta,
+            'elapsed_seconds': elapsed,
+            'progress': done / self.total if self.total else 1.0
+        }
+
+    def write_console(self, metrics, final=False):
+        mean_utilization = (sum(metrics['utilization']) / len(metrics['utilization'])
+                            if metrics['utilization'] else 0.0)
+        rate = metrics['numbers_per_second']
+        eta = metrics['eta_seconds']
+        eta_text = f"{eta:.0f}s" if eta != float('inf') else "?"
+
+        print(f"  [{self.label}] {100 * metrics['progress']:5.1f}% "
+              f"{metrics['numbers_done']:,}/{self.total:,} | "
+              f"{rate:,.0f} n/s | util {100 * mean_utilization:.0f}% | "
+              f"ETA {eta_text}", file=self.stream, flush=True)
+
+    def write_metrics_file(self, metrics, snapshot):
+        """Write Prometheus text exposition format, replacing atomically"""
+        label = f'run="{self.label}"'
+        lines = [
+            '# HELP collatz_numbers_done_total Numbers whose stopping time has been computed.',
+            '# TYPE collatz_numbers_done_total counter',
+        ]
+        for i, w in enumerate(snapshot):
+            lines.append(f'collatz_numbers_done_total{{{label},worker="{i}"}} {w[NUMBERS_DONE]}')
+        lines += [
+            '# HELP collatz_steps_done_total Collatz steps iterated.',
+            '# TYPE collatz_steps_done_total counter',
+        ]
+        for i, w in enumerate(snapshot):
+            lines.append(f'collatz_steps_done_total{{{label},worker="{i}"}} {w[STEPS_DONE]}')
+        lines += [
+            '# HELP collatz_current_chunk Start of the chunk each worker is processing.',
+            '# TYPE collatz_current_chunk gauge',
+        ]
+        for i, w in enumerate(snapshot):
+            lines.append(f'collatz_current_chunk{{{label},worker="{i}"}} {w[CURRENT_CHUNK]}')
+        lines += [
+            '# HELP collatz_worker_utilization Fraction of the last interval spent computing.',
+            '# TYPE collatz_worker_utilization gauge',
+        ]
+        for i, u in enumerate(metrics['utilization']):
+            lines.append(f'collatz_worker_utilization{{{label},worker="{i}"}} {u:.4f}')
+        lines += [
+            '# HELP collatz_numbers_per_second Throughput over the last interval.',
+            '# TYPE collatz_numbers_per_second gauge',
+            f'collatz_numbers_per_second{{{label}}} {metrics["numbers_per_second"]:.2f}',
+            '# HELP collatz_eta_seconds Estimated seconds until the run completes.',
+            '# TYPE collatz_eta_seconds gauge',
+            f'collatz_eta_seconds{{{label}}} {metrics["eta_seconds"]:.2f}',
+            '# HELP collatz_total_numbers Numbers to compute in this run.',
+            '# TYPE collatz_total_numbers gauge',
+            f'collatz_total_numbers{{{label}}} {self.total}',
+        ]
+
+        tmp_file = f"{self.metrics_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_file, self.metrics_file)
@@ -0,0 +1,342 @@
+"""
+Mergeable Reducers for Streaming Collatz Analysis
+
+Each reducer consumes chunks of stopping times and keeps a fixed-size
+summary, so ranges far beyond RAM can be analysed without a points list:
+
+    reducer.update(start, steps)   steps[i] is the stopping time of start + i
+    reducer.merge(other)           fold in a reducer covering a later range
+    reducer.finalize()             result dict (non-destructive)
+
+The engines (compute_batch, streaming_pipeline) run every reducer on a
+chunk inside the worker that computed it and merge the partial reducers
+in the parent in range order, so a new metric is one more class
+decorated with @register_reducer, never another pass over the data.
+
+As in compute_batch, numbers with zero steps (n = 1) are not part of the
+parallelogram and are ignored.
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import math
+
+import numpy as np
+from scipy import stats
+
+from parallelogram_geometry import envelope_geometry
+
+# Chunks larger than this could overflow the int64 offset sums used by
+# RegressionReducer
+MAX_CHUNK = 1 << 21
+# Residue classes n mod 2^RESIDUE_BITS tracked by ResidueClassReducer
+RESIDUE_BITS = 8
+
+# name -> reducer class, in registration order
+REDUCERS = {}
+DEFAULT_REDUCERS = ()
+
+
+def register_reducer(cls=None, default=True):
+    """Class decorator registering a reducer under its name
+
+    Default reducers run in every verification pass; others are looked
+    up by name (REDUCERS[name]) and passed to the engines explicitly.
+    """
+    def decorator(cls):
+        global DEFAULT_REDUCERS
+        if cls.name in REDUCERS:
+            raise ValueError(f"reducer {cls.name!r} is already registered")
+        REDUCERS[cls.name] = cls
+        if default:
+            DEFAULT_REDUCERS += (cls,)
+        return cls
+    return decorator(cls) if cls is not None else decorator
+
+
+def reduce_chunk(start, steps, reducers=None):
+    """Fresh reducers updated with one chunk (run inside workers)"""
+    active = [cls() for cls in (DEFAULT_REDUCERS if reducers is None else reducers)]
+    for reducer in active:
+        reducer.update(start, steps)
+    return active
+
+
+def merge_partials(active, partials):
+    """Merge one chunk's reducers into the running ones, in range order"""
+    for reducer, partial in zip(active, partials):
+        reducer.merge(partial)
+
+
+@register_reducer
+class MaxReducer:
+    """Maximum stopping time (W) and the smallest n attaining it"""
+
+    name = 'max'
+
+    def __init__(self):
+        self.max_steps = 0
+        self.argmax = None
+
+    def update(self, start, steps):
+        if not len(steps):
+            return
+        i = int(np.argmax(steps))
+        if steps[i] > self.max_steps:
+            self.max_steps = int(steps[i])
+            self.argmax = start + i
+
+    def merge(self, other):
+        if other.max_steps > self.max_steps:
+            self.max_steps = other.max_steps
+            self.argmax = other.argmax
+
+    def finalize(self):
+        return {'W': self.max_steps, 'argmax': self.argmax}
+
+
+@register_reducer
+class RegressionReducer:
+    """Exact running sums for the linear regression of n on steps"""
+
+    name = 'regression'
+
+    def __init__(self):
+        self.count = self.sum_x = self.sum_y = 0
+        self.sum_xx = self.sum_xy = self.sum_yy = 0
+
+    def update(self, start, steps):
+        # Offsets from start keep the int64 products small; the large
+        # terms are added back with Python ints. Beyond MAX_CHUNK numbers
+        # the sum of squared offsets would overflow, so longer inputs are
+        # summed in slices
+        for i in range(MAX_CHUNK, len(steps), MAX_CHUNK):
+            self.update(start + i, steps[i:i + MAX_CHUNK])
+        steps = steps[:MAX_CHUNK]
+        mask = steps > 0
+        x = steps[mask].astype(np.int64)
+        offsets = np.flatnonzero(mask).astype(np.int64)
+        count = len(x)
+        sum_x = int(x.sum())
+        sum_o = int(offsets.sum())
+
+        self.count += count
+        self.sum_x += sum_x
+        self.sum_y += count * start + sum_o
+        self.sum_xx += int(np.dot(x, x))
+        self.sum_xy += int(np.dot(x, offsets)) + start * sum_x
+        self.sum_yy += count * start * start + 2 * start * sum_o + int(np.dot(offsets, offsets))
+
+    def merge(self, other):
+        self.count += other.count
+        self.sum_x += other.sum_x
+        self.sum_y += other.sum_y
+        self.sum_xx += other.sum_xx
+        self.sum_xy += other.sum_xy
+        self.sum_yy += other.sum_yy
+
+    def finalize(self):
+        """Same quantities as scipy.stats.linregress(steps, n)
+
+        With fewer than three points, or no spread in either variable,
+        the fit is undefined and every quantity is NaN.
+        """
+        n = self.count
+        sxx = n * self.sum_xx - self.sum_x ** 2
+        sxy = n * self.sum_xy - self.sum_x * self.sum_y
+        syy = n * self.sum_yy - self.sum_y ** 2
+        if n < 3 or sxx == 0 or syy == 0:
+            nan = float('nan')
+            return {'slope': nan, 'intercept': nan, 'tilt_angle': nan, 'r_squared': nan,
+                    'p_value': nan, 'std_error': nan, 'count': n}
+        slope = sxy / sxx
+        r_squared = sxy * sxy / (sxx * syy)
+        r = math.copysign(math.sqrt(r_squared), sxy)
+        dof = n - 2
+        if r_squared < 1.0:
+            t = r * math.sqrt(dof / ((1.0 - r) * (1.0 + r)))
+            p_value = float(2 * stats.t.sf(abs(t), dof))
+        else:
+            p_value = 0.0
+        return {
+            'slope': slope,
+            'intercept': (self.sum_y - slope * self.sum_x) / n,
+            'tilt_angle': math.degrees(math.atan(slope)),
+            'r_squared': r_squared,
+            'p_value': p_value,
+            'std_error': math.sqrt((1 - r_squared) * syy / sxx / dof),
+            'count': n
+        }
+
+
+@register_reducer
+class HistogramReducer:
+    """Counts per stopping time"""
+
+    name = 'histogram'
+
+    def __init__(self):
+        self.histogram = np.zeros(0, dtype=np.int64)
+
+    def _add(self, counts):
+        if len(counts) > len(self.histogram):
+            self.histogram = np.pad(self.histogram, (0, len(counts) - len(self.histogram)))
+        self.histogram[:len(counts)] += counts
+
+    def update(self, start, steps):
+        if not len(steps):
+            return
+        counts = np.bincount(steps)
+        counts[0] = 0
+        self._add(counts)
+
+    def merge(self, other):
+        self._add(other.histogram)
+
+    def finalize(self):
+        return {'histogram': self.histogram.copy()}
+
+
+@register_reducer
+class RecordsReducer:
+    """Stopping-time records: n whose steps exceed those of every smaller n"""
+
+    name = 'records'
+
+    def __init__(self):
+        self.records = []
+        self.max_steps = 0
+
+    def update(self, start, steps):
+        # Candidates are the positions where the chunk's running max rises
+        running = np.maximum.accumulate(steps)
+        rises = np.flatnonzero(np.diff(running, prepend=0) > 0)
+        for i in rises:
+            if steps[i] > self.max_steps:
+                self.max_steps = int(steps[i])
+                self.records.append((start + int(i), self.max_steps))
+
+    def merge(self, other):
+        for n, steps in other.records:
+            if steps > self.max_steps:
+                self.max_steps = steps
+                self.records.append((n, steps))
+
+    def finalize(self):
+        return {'records': list(self.records)}
+
+
+@register_reducer
+class EnvelopeReducer:
+    """Smallest and largest n for every stopping time (O(W) memory)
+
+    finalize() derives the convex hull, the minimum-area enclosing
+    parallelogram, its edge slopes and areas from the envelope.
+    """
+
+    name = 'envelope'
+
+    def __init__(self):
+        self.min_n = np.zeros(0, dtype=np.int64)
+        self.max_n = np.zeros(0, dtype=np.int64)
+
+    def _grow(self, length):
+        if length > len(self.max_n):
+            extra = length - len(self.max_n)
+            self.min_n = np.pad(self.min_n, (0, extra))
+            self.max_n = np.pad(self.max_n, (0, extra))
+
+    def _combine(self, steps, low, high):
+        """Fold per-step minima/maxima in; 0 marks steps not seen yet"""
+        self._grow(int(steps.max()) + 1)
+        current = self.min_n[steps]
+        self.min_n[steps] = np.where(current == 0, low, np.minimum(current, low))
+        self.max_n[steps] = np.maximum(self.max_n[steps], high)
+
+    def update_points(self, steps, n):
+        """Fold in arbitrary (steps, n) pairs"""
+        steps = np.asarray(steps, dtype=np.int64)
+        n = np.asarray(n, dtype=np.int64)
+        mask = steps > 0
+        steps, n = steps[mask], n[mask]
+        if not len(steps):
+            return
+        size = int(steps.max()) + 1
+        low = np.full(size, np.iinfo(np.int64).max)
+        np.minimum.at(low, steps, n)
+        high = np.zeros(size, dtype=np.int64)
+        np.maximum.at(high, steps, n)
+        present = np.flatnonzero(high > 0)
+        self._combine(present, low[present], high[present])
+
+    def update(self, start, steps):
+        # n increases along the chunk, so the first and last occurrence of
+        # each stopping time are its minimum and maximum n
+        steps = np.asarray(steps)
+        mask = steps > 0
+        if not mask.any():
+            return
+        offsets = np.flatnonzero(mask)
+        values = steps[mask]
+        unique, first = np.unique(values, return_index=True)
+        _, last = np.unique(values[::-1], return_index=True)
+        last = len(values) - 1 - last
+        self._combine(unique.astype(np.int64), start + offsets[first], start + offsets[last])
+
+    def merge(self, other):
+        present = np.flatnonzero(other.max_n > 0)
+        if len(present):
+            self._combine(present, other.min_n[present], other.max_n[present])
+
+    def finalize(self):
+        return {
+            'min_n': self.min_n.copy(),
+            'max_n': self.max_n.copy(),
+            'geometry': envelope_geometry(self.min_n, self.max_n)
+        }
+
+
+@register_reducer
+class ResidueClassReducer:
+    """Stopping-time count, mean, variance and maximum per n mod 2^k"""
+
+    name = 'residues'
+
+    def __init__(self, bits=RESIDUE_BITS):
+        self.bits = bits
+        size = 1 << bits
+        self.count = np.zeros(size, dtype=np.int64)
+        self.sum = np.zeros(size, dtype=np.int64)
+        self.sum_sq = np.zeros(size, dtype=np.int64)
+        self.max = np.zeros(size, dtype=np.int64)
+
+    def update(self, start, steps):
+        steps = np.asarray(steps, dtype=np.int64)
+        size = 1 << self.bits
+        residues = (start + np.arange(len(steps), dtype=np.int64)) & (size - 1)
+        mask = steps > 0
+        residues, steps = residues[mask], steps[mask]
+        # Float weights stay exact: steps^2 < 2^32 and chunks hold at most
+        # MAX_CHUNK = 2^21 numbers
+        self.count += np.bincount(residues, minlength=size)
+        self.sum += np.bincount(residues, weights=steps, minlength=size).astype(np.int64)
+        self.sum_sq += np.bincount(residues, weights=steps * steps, minlength=size).astype(np.int64)
+        np.maximum.at(self.max, residues, steps)
+
+    def merge(self, other):
+        self.count += other.count
+        self.sum += other.sum
+        self.sum_sq += other.sum_sq
+        np.maximum(self.max, other.max, out=self.max)
+
+    def finalize(self):
+        count = np.maximum(self.count, 1)
+        mean = self.sum / count
+        return {
+            'modulus': 1 << self.bits,
+            'count': self.count.copy(),
+            'mean': mean,
+            'variance': self.sum_sq / count - mean ** 2,
+            'max': self.max.copy()
+        }
@@ -0,0 +1,241 @@
+"""
+Resource-Aware Worker Sizing and CPU Affinity
+
+cpu_count() reports every core of the host, even inside a container
+limited to two of them. The planner instead reads what this process may
+actually use:
+
+- CPUs: the scheduler affinity mask (os.sched_getaffinity), capped by
+  the cgroup CPU quota (cgroup v2 cpu.max or v1 cfs_quota_us)
+- memory: the cgroup memory limit minus current usage, capped by the
+  host's MemAvailable
+
+and turns it into a process count and chunk size for the parallel
+engines; when memory cannot hold one worker per CPU, fewer workers are
+started. Settings come from the command line (advanced_verification.py
+--processes / --memory-limit / --pin-cpus) or the environment, so pool
+workers and subprocesses started by the research agent see them too:
+
+    COLLATZ_PROCESSES      worker processes (default: available CPUs)
+    COLLATZ_MEMORY_LIMIT   bytes the run may use (default: available memory)
+    COLLATZ_PIN_CPUS=1     pin worker i to the i-th allowed core
+
+Usage:
+    python resource_planner.py --N 1e7
+    python resource_planner.py --N 1e7 --in-flight-bytes 240 --resident-bytes 136
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import argparse
+import math
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from cli_numbers import parse_int
+
+PROCESSES_ENV = 'COLLATZ_PROCESSES'
+MEMORY_LIMIT_ENV = 'COLLATZ_MEMORY_LIMIT'
+PIN_ENV = 'COLLATZ_PIN_CPUS'
+
+CGROUP_ROOT = Path('/sys/fs/cgroup')
+# Share of the available memory a run plans to use; the rest is headroom
+MEMORY_FRACTION = 0.5
+CHUNKS_PER_PROCESS = 16
+# Resident memory of one worker process with numpy and scipy loaded
+WORKER_BYTES = 128 * 2**20
+# Below this chunk size the planner starts fewer processes instead
+MIN_CHUNK_SIZE = 1 << 12
+
+
+def _read(path):
+    try:
+        return Path(path).read_text().strip()
+    except (OSError, ValueError):
+        return None
+
+
+def _cgroup_dirs(controller):
+    """Candidate cgroup directories of this process for a controller"""
+    dirs = []
+    for line in (_read('/proc/self/cgroup') or '').splitlines():
+        _, controllers, path = line.split(':', 2)
+        path = path.lstrip('/')
+        if controllers == '':
+            dirs += [CGROUP_ROOT / path, CGROUP_ROOT]  # v2 unified hierarchy
+        elif controller in controllers.split(','):
+            base = CGROUP_ROOT / controllers
+            dirs += [base / path, base]
+    return dirs
+
+
+def cpu_quota():
+    """CPUs allowed by the cgroup quota, or None when unlimited"""
+    for directory in _cgroup_dirs('cpu'):
+        value = _read(directory / 'cpu.max')
+        if value:
+            quota, period = value.split()
+            return None if quota == 'max' else int(quota) / int(period)
+        quota = _read(directory / 'cpu.cfs_quota_us')
+        period = _read(directory / 'cpu.cfs_period_us')
+        if quota and period:
+            return None if int(quota) < 0 else int(quota) / int(period)
+    return None
+
+
+def usable_cpus():
+    """Sorted ids of the cores this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def available_cpus():
+    """Worker processes the box can run without oversubscription"""
+    override = os.environ.get(PROCESSES_ENV)
+    if override:
+        return max(1, int(override))
+    cpus = len(usable_cpus())
+    quota = cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+def available_memory():
+    """Bytes this process can still allocate, or None if unknown"""
+    override = os.environ.get(MEMORY_LIMIT_ENV)
+    if override:
+        return int(override)
+
+    candidates = []
+    meminfo = _read('/proc/meminfo') or ''
+    for line in meminfo.splitlines():
+        if line.startswith('MemAvailable:'):
+            candidates.append(int(line.split()[1]) * 1024)
+    if not candidates and hasattr(os, 'sysconf'):
+        try:
+            candidates.append(os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE'))
+        except (ValueError, OSError):
+            pass
+
+    for directory in _cgroup_dirs('memory'):
+        limit = _read(directory / 'memory.max') or _read(directory / 'memory.limit_in_bytes')
+        usage = _read(directory / 'memory.current') or _read(directory / 'memory.usage_in_bytes')
+        # cgroup v1 reports "no limit" as a huge page-aligned number
+        if limit and limit != 'max' and int(limit) < 1 << 60:
+            candidates.append(max(0, int(limit) - int(usage or 0)))
+            break
+
+    return min(candidates) if candidates else None
+
+
+def pinning_enabled():
+    return os.environ.get(PIN_ENV, '') not in ('', '0')
+
+
+def configure(processes=None, memory_limit=None, pin=False):
+    """Apply settings to this process and any workers or children it starts"""
+    if processes:
+        os.environ[PROCESSES_ENV] = str(processes)
+    if memory_limit:
+        os.environ[MEMORY_LIMIT_ENV] = str(memory_limit)
+    if pin:
+        os.environ[PIN_ENV] = '1'
+
+
+@dataclass
+class ResourcePlan:
+    processes: int
+    chunk_size: int
+    memory_budget: int
+    cpus: list
+    pin: bool
+    warnings: list = field(default_factory=list)
+
+    def describe(self):
+        budget = f"{self.memory_budget / 2**20:,.0f} MiB" if self.memory_budget else "unknown"
+        cores = [self.cpus[i % len(self.cpus)] for i in range(self.processes)]
+        pinned = ", workers pinned to cores " + ','.join(map(str, cores)) if self.pin else ""
+        return (f"{self.processes} processes, chunks of {self.chunk_size:,}, "
+                f"memory budget {budget}{pinned}")
+
+
+def plan(N=None, in_flight_bytes=0, resident_bytes=0, chunks_per_process=CHUNKS_PER_PROCESS,
+         processes=None):
+    """Process count and chunk size for a run over 1..N
+
+    in_flight_bytes: memory per number while its chunk is being computed
+    or transferred; two chunks per process are in flight at a time.
+    resident_bytes: memory per number the parent keeps for the whole run
+    (the points list of comprehensive_verification).
+    Each process costs WORKER_BYTES plus its chunks in flight; when the
+    budget cannot hold that for every available CPU, fewer processes are
+    planned. processes fixes the count instead (a pool already running)
+    and only the chunk size is planned for it.
+    """
+    fixed = processes is not None
+    processes = processes or available_cpus()
+    memory = available_memory()
+    budget = int(memory * MEMORY_FRACTION) if memory is not None else None
+    warnings = []
+
+    if budget is not None:
+        resident = (N or 0) * resident_bytes
+        if resident > budget:
+            warnings.append(f"keeping {N:,} points needs ~{resident / 2**30:.1f} GiB of "
+                            f"{budget / 2**30:.1f} GiB budget; use --streaming")
+        spare = max(budget - resident, budget // 4)
+        affordable = max(1, spare // (WORKER_BYTES + 2 * MIN_CHUNK_SIZE * in_flight_bytes))
+        if not fixed and affordable < processes:
+            warnings.append(f"memory budget of {budget / 2**30:.1f} GiB fits {affordable} "
+                            f"of {processes} worker processes")
+            processes = affordable
+
+    if N is None:
+        chunk_size = 1
+    else:
+        chunk_size = max(1, -(-N // (processes * chunks_per_process)))
+        if budget is not None and in_flight_bytes:
+            chunks = max(0, spare - processes * WORKER_BYTES)
+            chunk_size = max(1, min(chunk_size, chunks // (2 * processes * in_flight_bytes)))
+
+    return ResourcePlan(processes, chunk_size, budget, usable_cpus(), pinning_enabled(), warnings)
+
+
+def init_worker(slot):
+    """Pool initializer: pin worker number slot to one allowed core"""
+    if pinning_enabled() and hasattr(os, 'sched_setaffinity'):
+        cpus = usable_cpus()
+        os.sched_setaffinity(0, {cpus[slot % len(cpus)]})
+
+
+def main(argv=None, in_flight_bytes=0, resident_bytes=0):
+    """Print the plan; the per-number memory costs default to the given ones"""
+    parser = argparse.ArgumentParser(description='Show the worker plan for this machine')
+    parser.add_argument('--N', default=None, help='range size to plan chunks for, e.g. 1e7')
+    parser.add_argument('--in-flight-bytes', type=int, default=in_flight_bytes,
+                        help='memory per number while its chunk is computed '
+                             '(advanced_verification.IN_FLIGHT_BYTES_PER_NUMBER)')
+    parser.add_argument('--resident-bytes', type=int, default=resident_bytes,
+                        help='memory per number the parent keeps for the whole run '
+                             '(advanced_verification.RESIDENT_BYTES_PER_POINT)')
+    args = parser.parse_args(argv)
+
+    N = parse_int(args.N) if args.N else None
+    memory = available_memory()
+    quota = cpu_quota()
+
+    print(f"Allowed cores: {','.join(map(str, usable_cpus()))} (host reports {os.cpu_count()})")
+    print(f"cgroup CPU quota: {'none' if quota is None else f'{quota:g} CPUs'}")
+    print(f"Available memory: {'unknown' if memory is None else f'{memory / 2**30:.2f} GiB'}")
+    resources = plan(N, args.in_flight_bytes, args.resident_bytes)
+    print(f"Plan: {resources.describe()}")
+    for warning in resources.warnings:
+        print(f"⚠️ {warning}")
+
+
+if __name__ == "__main__":
+    main()
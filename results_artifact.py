@@ -0,0 +1,175 @@
+"""
+Binary Columnar Results Artifact
+
+A results artifact is a directory holding one .npy file per column plus
+a JSON metadata file, so plotting and model fitting can reload a
+multi-hour verification in seconds and only touch what they need:
+
+    <name>.collatz/metadata.json      metadata, statistical models, summary,
+                                      non-scalar per-checkpoint fields
+    <name>.collatz/columns/<field>.npy  one value per checkpoint (N, W, ...)
+    <name>.collatz/histograms.npy     optional, checkpoints x stopping time
+    <name>.collatz/envelopes.npy      optional, checkpoints x stopping time x
+                                      (min n, max n)
+    <name>.collatz/residues.npy       optional, checkpoints x (count, mean,
+                                      max) x residue class n mod 2^k
+    <name>.collatz/steps.npy          optional, uint16 step table, steps[n-1]
+    <name>.collatz/level_*.npy        optional, CSR index stopping time -> n
+                                      (level_index.py)
+
+Arrays are opened with mmap_mode='r' on first access, so loading an
+artifact costs nothing until a column is actually read. A run calls
+clear_arrays before saving its optional arrays, and metadata.json lists
+the arrays present when it was written, so arrays left over from an
+earlier run into the same directory are never read as this run's.
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+METADATA_FILE = 'metadata.json'
+COLUMNS_DIR = 'columns'
+
+
+def _json_default(value):
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def save_array(path, name, array):
+    """Write one array into the artifact, replacing it atomically"""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    tmp = path / f"{name}.tmp.npy"
+    np.save(tmp, np.asarray(array))
+    os.replace(tmp, path / f"{name}.npy")
+
+
+def clear_arrays(path):
+    """Remove the optional arrays of an earlier run, before a new run saves its own"""
+    for array in Path(path).glob('*.npy'):
+        array.unlink()
+
+
+def write_artifact(path, results, models=None, metadata=None, summary=None):
+    """Write per-checkpoint results as columns plus JSON metadata
+
+    Scalar fields become columns; dict/list fields such as
+    steps_quantiles are kept in the metadata. Point lists and per-result
+    arrays are not stored here; use save_array for the step table and
+    histograms, before this call: the metadata records which optional
+    arrays belong to the run.
+    """
+    path = Path(path)
+    columns = {}
+    nested = {}
+    for key in results[0]:
+        values = [r.get(key) for r in results]
+        if key == 'points' or isinstance(values[0], np.ndarray):
+            continue
+        if all(isinstance(v, (int, float, np.integer, np.floating)) for v in values):
+            columns[key] = np.array(values)
+        else:
+            nested[key] = values
+
+    for key, column in columns.items():
+        save_array(path / COLUMNS_DIR, key, column)
+
+    document = {
+        'metadata': metadata or {},
+        'statistical_models': models,
+        'summary': summary,
+        'columns': list(columns),
+        'nested_fields': nested,
+        'num_checkpoints': len(results),
+        'arrays': sorted(array.stem for array in path.glob('*.npy'))
+    }
+    tmp = path / f"{METADATA_FILE}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(document, f, default=_json_default)
+    os.replace(tmp, path / METADATA_FILE)
+
+
+class Artifact:
+    """Lazily memory-mapped view of a results artifact"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / METADATA_FILE) as f:
+            self.document = json.load(f)
+        self._arrays = {}
+
+    @property
+    def metadata(self):
+        return self.document['metadata']
+
+    @property
+    def models(self):
+        return self.document['statistical_models']
+
+    def _array(self, relative):
+        if '/' not in relative and not self.has(relative):
+            raise FileNotFoundError(f"{self.path} has no {relative} array for this run")
+        if relative not in self._arrays:
+            self._arrays[relative] = np.load(self.path / f"{relative}.npy", mmap_mode='r')
+        return self._arrays[relative]
+
+    def column(self, name):
+        return self._array(f"{COLUMNS_DIR}/{name}")
+
+    def has(self, name):
+        """Whether the optional array name was saved by the run in metadata.json"""
+        arrays = self.document.get('arrays')
+        if arrays is not None and name not in arrays:
+            return False
+        return (self.path / f"{name}.npy").exists()
+
+    @property
+    def histograms(self):
+        """Histogram table, row i for checkpoint i"""
+        return self._array('histograms')
+
+    @property
+    def envelopes(self):
+        """Envelope table: envelopes[i, s] = (min n, max n) at checkpoint i"""
+        return self._array('envelopes')
+
+    @property
+    def steps(self):
+        """Step table: steps[n - 1] is the stopping time of n"""
+        return self._array('steps')
+
+    def points(self, N=None):
+        """(steps, n) arrays for n <= N read from the step table
+
+        Like the in-memory points lists, n = 1 (zero steps) is left out.
+        """
+        steps = self.steps if N is None else self.steps[:N]
+        n = np.arange(1, len(steps) + 1)
+        return np.asarray(steps[1:]), n[1:]
+
+    def results(self):
+        """Per-checkpoint result dicts, as returned by the compute routines"""
+        names = self.document['columns']
+        columns = {name: self.column(name).tolist() for name in names}
+        nested = self.document['nested_fields']
+        return [
+            {**{name: columns[name][i] for name in names},
+             **{name: values[i] for name, values in nested.items()}}
+            for i in range(self.document['num_checkpoints'])
+        ]
+
+
+def load_artifact(path):
+    return Artifact(path)
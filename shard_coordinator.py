@@ -0,0 +1,310 @@
+"""
+Multi-Node Range Sharding with a File-Based Coordinator
+
+Splits 1..N into shards tracked in a shared directory (NFS or any shared
+filesystem) so several hosts can work on one verification run:
+
+    <dir>/plan.json                 N, shard size, shard count
+    <dir>/pending/shard-000042      shards waiting for a worker
+    <dir>/claimed/shard-000042@host-123   claimed shards (mtime = heartbeat)
+    <dir>/results/shard-000042.pkl  the shard's partial reducers
+    <dir>/summary.json              merged result, written by the coordinator
+
+Workers claim shards with an atomic rename, refresh the claim's mtime while
+computing, and store the shard's registered reducers (reducers.py: max,
+regression, histogram, records, envelope, residues) before finalizing. The
+coordinator moves claims whose heartbeat is older than the lease back to
+pending, so shards of lost workers are reassigned, and merges the partial
+reducers in range order once every shard is done.
+
+Usage:
+    python shard_coordinator.py plan --dir runs/1e9 --N 1e9 --shard-size 10000000
+    python shard_coordinator.py worker --dir runs/1e9          # on every host
+    python shard_coordinator.py coordinate --dir runs/1e9      # on one host
+    python shard_coordinator.py local --dir /tmp/run --N 1e6 --workers 4
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import argparse
+import json
+import os
+import pickle
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+import resource_planner
+from advanced_verification import collatz_steps, STEPS_UNKNOWN
+from cli_numbers import parse_int
+from reducers import merge_partials, reduce_chunk, DEFAULT_REDUCERS, MAX_CHUNK
+
+HEARTBEAT_EVERY = 10000
+DEFAULT_LEASE = 300.0
+POLL_INTERVAL = 1.0
+
+
+def summarize_range(start, end, heartbeat=None):
+    """Partial reducers for start..end, the shard's mergeable summary
+
+    The range is reduced in slices of at most MAX_CHUNK numbers.
+    heartbeat() is called every HEARTBEAT_EVERY numbers.
+    """
+    active = [cls() for cls in DEFAULT_REDUCERS]
+    for first in range(start, end + 1, MAX_CHUNK):
+        last = min(first + MAX_CHUNK - 1, end)
+        steps = np.zeros(last - first + 1, dtype=np.uint16)
+        for i, n in enumerate(range(first, last + 1)):
+            value = collatz_steps(n)
+            steps[i] = value if value >= 0 else STEPS_UNKNOWN
+            if heartbeat is not None and (n - start) % HEARTBEAT_EVERY == HEARTBEAT_EVERY - 1:
+                heartbeat()
+        merge_partials(active, reduce_chunk(first, steps))
+    return {'start': start, 'end': end, 'partials': active}
+
+
+def merge_summaries(summaries):
+    """Merge shard summaries, in range order, into finalized results
+
+    prefix_max lists (shard end, W so far) after every shard.
+    """
+    summaries = sorted(summaries, key=lambda s: s['start'])
+    active = [cls() for cls in DEFAULT_REDUCERS]
+    prefix_max = []
+    for summary in summaries:
+        merge_partials(active, summary['partials'])
+        prefix_max.append([summary['end'], active[0].finalize()['W']])
+
+    reduced = {r.name: r.finalize() for r in active}
+    return {
+        'start': summaries[0]['start'],
+        'end': summaries[-1]['end'],
+        'max_steps': reduced['max']['W'],
+        'prefix_max': prefix_max,
+        **reduced
+    }
+
+
+def _json_default(value):
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def write_json_atomic(path, data):
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, default=_json_default)
+    os.replace(tmp, path)
+
+
+def write_pickle_atomic(path, data):
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'wb') as f:
+        pickle.dump(data, f)
+    os.replace(tmp, path)
+
+
+class ShardDirectory:
+    """A sharded run tracked in a shared directory"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.pending = self.path / 'pending'
+        self.claimed = self.path / 'claimed'
+        self.results = self.path / 'results'
+
+    def plan(self, N, shard_size):
+        """Create the shard files for 1..N"""
+        for d in (self.pending, self.claimed, self.results):
+            d.mkdir(parents=True, exist_ok=True)
+        num_shards = -(-N // shard_size)
+        write_json_atomic(self.path / 'plan.json',
+                          {'N': N, 'shard_size': shard_size, 'num_shards': num_shards})
+        for i in range(num_shards):
+            name = self.shard_name(i)
+            if not self.result_file(name).exists():
+                (self.pending / name).touch()
+        print(f"Planned {num_shards} shards of {shard_size:,} covering N={N:,} in {self.path}")
+
+    def load_plan(self):
+        with open(self.path / 'plan.json') as f:
+            return json.load(f)
+
+    def result_file(self, name):
+        return self.results / f"{name}.pkl"
+
+    @staticmethod
+    def shard_name(index):
+        return f"shard-{index:06d}"
+
+    def shard_range(self, name, plan):
+        index = int(name.split('-')[1])
+        start = index * plan['shard_size'] + 1
+        return start, min(start + plan['shard_size'] - 1, plan['N'])
+
+    def claim(self, worker_id):
+        """Atomically move one pending shard to claimed; None if none left"""
+        for entry in sorted(os.listdir(self.pending)):
+            target = self.claimed / f"{entry}@{worker_id}"
+            try:
+                os.rename(self.pending / entry, target)
+            except FileNotFoundError:
+                continue  # Another worker won the race
+            return entry, target
+        return None
+
+    def reap(self, lease):
+        """Return claims whose heartbeat is older than lease to pending"""
+        reaped = []
+        now = time.time()
+        for entry in os.listdir(self.claimed):
+            claim = self.claimed / entry
+            name = entry.split('@')[0]
+            try:
+                stale = now - claim.stat().st_mtime > lease
+                if stale and not self.result_file(name).exists():
+                    os.rename(claim, self.pending / name)
+                    reaped.append(name)
+                elif stale:
+                    os.remove(claim)
+            except FileNotFoundError:
+                continue
+        return reaped
+
+    def completed(self):
+        return sorted(p.stem for p in self.results.glob('shard-*.pkl'))
+
+    def is_done(self, plan):
+        return len(self.completed()) >= plan['num_shards']
+
+    def merge(self):
+        """Merge all shard results and write summary.json"""
+        summaries = []
+        for name in self.completed():
+            with open(self.result_file(name), 'rb') as f:
+                summaries.append(pickle.load(f))
+        merged = merge_summaries(summaries)
+        write_json_atomic(self.path / 'summary.json', merged)
+        return merged
+
+
+def heartbeat(claim):
+    """Refresh a claim's mtime; a reaped claim is simply left alone"""
+    try:
+        os.utime(claim)
+    except FileNotFoundError:
+        pass
+
+
+def run_worker(path, worker_id=None, lease=DEFAULT_LEASE, exit_when_idle=False):
+    """Claim and compute shards until every shard has a result"""
+    shards = ShardDirectory(path)
+    plan = shards.load_plan()
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    done = 0
+
+    while True:
+        claimed = shards.claim(worker_id)
+        if claimed is None:
+            if exit_when_idle or shards.is_done(plan):
+                break
+            shards.reap(lease)
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        name, claim = claimed
+        start, end = shards.shard_range(name, plan)
+        result_file = shards.result_file(name)
+        if not result_file.exists():
+            summary = summarize_range(start, end, heartbeat=lambda: heartbeat(claim))
+            write_pickle_atomic(result_file, summary)
+            done += 1
+        try:
+            os.remove(claim)
+        except FileNotFoundError:
+            pass  # Reaped while we were finishing; the result still counts
+
+    print(f"Worker {worker_id} finished {done} shards")
+    return done
+
+
+def run_coordinator(path, lease=DEFAULT_LEASE, poll=POLL_INTERVAL):
+    """Reassign lost shards until all are done, then merge"""
+    shards = ShardDirectory(path)
+    plan = shards.load_plan()
+
+    while not shards.is_done(plan):
+        for name in shards.reap(lease):
+            print(f"Reassigning {name} (no heartbeat for {lease:.0f}s)")
+        time.sleep(poll)
+
+    merged = shards.merge()
+    print(f"N={plan['N']:,}: W={merged['max_steps']}, "
+          f"θ={merged['regression']['tilt_angle']:.4f}°, "
+          f"R²={merged['regression']['r_squared']:.8f}")
+    print(f"✅ Summary saved to: {shards.path / 'summary.json'}")
+    return merged
+
+
+def run_local(path, N, shard_size, workers, lease):
+    """Plan a run and drive it with worker processes standing in for nodes"""
+    ShardDirectory(path).plan(N, shard_size)
+    procs = [subprocess.Popen([sys.executable, os.path.abspath(__file__), 'worker',
+                               '--dir', str(path), '--worker-id', f"local-{i}",
+                               '--lease', str(lease)])
+             for i in range(workers)]
+    merged = run_coordinator(path, lease=lease)
+    for p in procs:
+        p.wait()
+    return merged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sharded Collatz verification')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('plan', help='create shards for 1..N')
+    p.add_argument('--dir', required=True)
+    p.add_argument('--N', type=parse_int, required=True, help='e.g. 1e9')
+    p.add_argument('--shard-size', type=int, default=1000000)
+
+    p = sub.add_parser('worker', help='claim and compute shards')
+    p.add_argument('--dir', required=True)
+    p.add_argument('--worker-id', default=None)
+    p.add_argument('--lease', type=float, default=DEFAULT_LEASE)
+    p.add_argument('--exit-when-idle', action='store_true')
+
+    p = sub.add_parser('coordinate', help='reassign lost shards and merge results')
+    p.add_argument('--dir', required=True)
+    p.add_argument('--lease', type=float, default=DEFAULT_LEASE)
+
+    p = sub.add_parser('local', help='plan and run with several local workers')
+    p.add_argument('--dir', required=True)
+    p.add_argument('--N', type=parse_int, required=True, help='e.g. 1e9')
+    p.add_argument('--shard-size', type=int, default=100000)
+    p.add_argument('--workers', type=int, default=resource_planner.available_cpus())
+    p.add_argument('--lease', type=float, default=DEFAULT_LEASE)
+
+    args = parser.parse_args(argv)
+    if args.command == 'plan':
+        ShardDirectory(args.dir).plan(args.N, args.shard_size)
+    elif args.command == 'worker':
+        run_worker(args.dir, args.worker_id, args.lease, args.exit_when_idle)
+    elif args.command == 'coordinate':
+        run_coordinator(args.dir, args.lease)
+    else:
+        run_local(args.dir, args.N, args.shard_size, args.workers, args.lease)
+
+
+if __name__ == "__main__":
+    main()
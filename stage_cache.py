@@ -0,0 +1,280 @@
+"""
+Content-Addressed Stage Result Cache
+
+The research agent used to skip a stage whenever a boolean said it had
+run once, so a changed script or parameter either went unnoticed or
+forced everything to rerun. Each stage result is now stored under the
+hash of everything that can change it:
+
+- the command line (script options)
+- the declared N values
+- the source of the script and of every local module its code can
+  reach: imports at module level and inside the functions and classes it
+  actually uses, which covers the stopping-time kernels
+  (advanced_verification.collatz_steps, fast_kernels, reducers, ...)
+  but not a module only imported by some unused function
+
+    .stage_cache/<stage>/<key>/manifest.json   inputs, parsed results,
+                                               output tail, run time
+    .stage_cache/<stage>/<key>/files/...       copies of the stage outputs
+
+A stage whose key is in the cache is not run: its output files are
+restored into the workspace and its recorded results reused. Only
+stages whose inputs changed are recomputed.
+
+Usage:
+    python stage_cache.py                 # list cached stage results
+    python stage_cache.py --clear
+    python stage_cache.py --check verify_collatz.py advanced_verification.py
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CACHE_DIR = '.stage_cache'
+MANIFEST_FILE = 'manifest.json'
+FILES_DIR = 'files'
+
+
+def file_digest(path):
+    """sha256 of a file, or of every file under a directory"""
+    path = Path(path)
+    digest = hashlib.sha256()
+    files = sorted(p for p in path.rglob('*') if p.is_file()) if path.is_dir() else [path]
+    for file in files:
+        digest.update(str(file.relative_to(path) if path.is_dir() else file.name).encode())
+        with open(file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _imports(node):
+    """(bound name, module, imported name or None) for an import statement"""
+    if isinstance(node, ast.Import):
+        return [(alias.asname or alias.name.split('.')[0],
+                 alias.name if alias.asname else alias.name.split('.')[0], None)
+                for alias in node.names]
+    if isinstance(node, ast.ImportFrom) and node.module and not node.level:
+        return [(alias.asname or alias.name, node.module, alias.name) for alias in node.names]
+    return []
+
+
+class _Module:
+    """Top-level code and the top-level function/class bodies of one file"""
+
+    def __init__(self, path):
+        self.name = path.stem
+        tree = ast.parse(path.read_text(), filename=path.name)
+        self.top = []
+        self.defs = {}
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                self.defs[node.name] = node
+                # Decorators, defaults and base classes run at import time
+                self.top += node.decorator_list
+                if isinstance(node, ast.ClassDef):
+                    self.top += node.bases
+                else:
+                    self.top += [d for d in node.args.defaults + node.args.kw_defaults if d]
+            else:
+                self.top.append(node)
+        self.bindings = self._bindings(self.top)
+
+    @staticmethod
+    def _bindings(nodes):
+        """Imported names bound by nodes: name -> (module, imported name or None)"""
+        return {name: (module, imported)
+                for root in nodes for node in ast.walk(root)
+                for name, module, imported in _imports(node)}
+
+    def references(self, name=None):
+        """(module, name or None) pairs used by the top-level code or def name"""
+        nodes = self.top if name is None else [self.defs[name]]
+        bindings = self.bindings if name is None else {**self.bindings, **self._bindings(nodes)}
+        found = set()
+        for root in nodes:
+            for node in ast.walk(root):
+                found.update((module.split('.')[0], None) for _, module, _ in _imports(node))
+                if isinstance(node, ast.Name):
+                    if node.id in self.defs:
+                        found.add((self.name, node.id))
+                    elif node.id in bindings and bindings[node.id][1] is not None:
+                        found.add(bindings[node.id])
+                elif isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+                    # module.function, with module bound by "import module"
+                    module, imported = bindings.get(node.value.id, (None, ''))
+                    if imported is None:
+                        found.add((module, node.attr))
+        return found
+
+
+def local_imports(script, root):
+    """The script and every module under root its code can reach
+
+    Follows imports at module level and inside the functions and classes
+    that are actually referenced, starting from the script's top-level
+    code; a lazy import in a function nobody uses is not followed.
+    """
+    root = Path(root)
+    modules = {}
+    seen = set()
+    pending = [(Path(script).stem, None)]
+    while pending:
+        module, name = pending.pop()
+        if (module, name) in seen or not (root / f"{module}.py").exists():
+            continue
+        seen.add((module, name))
+        if module not in modules:
+            modules[module] = _Module(root / f"{module}.py")
+            # Importing a module runs its top-level code
+            pending.append((module, None))
+        if name is not None and name not in modules[module].defs:
+            continue
+        pending += modules[module].references(name)
+    return sorted(f"{module}.py" for module in modules)
+
+
+class StageCache:
+    """Stage outputs stored under the hash of the stage's inputs"""
+
+    def __init__(self, workspace='.', cache_dir=CACHE_DIR):
+        self.workspace = Path(workspace)
+        self.root = self.workspace / cache_dir
+
+    def inputs(self, script, command, N_values=None):
+        """Everything a stage's results depend on"""
+        return {
+            'command': command,
+            'N_values': list(N_values or []),
+            'sources': {name: file_digest(self.workspace / name)
+                        for name in local_imports(script, self.workspace)}
+        }
+
+    @staticmethod
+    def key(inputs):
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    def _entry(self, stage, key):
+        return self.root / stage / key
+
+    def lookup(self, stage, key):
+        """Manifest of a complete cached result, or None"""
+        manifest = self._entry(stage, key) / MANIFEST_FILE
+        if not manifest.exists():
+            return None
+        with open(manifest) as f:
+            return json.load(f)
+
+    def store(self, stage, key, inputs, outputs, record):
+        """Copy the stage's outputs into the cache and write its manifest last
+
+        record holds what the agent needs on a hit: parsed results, the
+        output tail and the elapsed time of the run.
+        """
+        entry = self._entry(stage, key)
+        tmp = entry.with_name(f"{key}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        files = tmp / FILES_DIR
+        files.mkdir(parents=True)
+        stored = {}
+        for name in outputs:
+            source = self.workspace / name
+            if source.is_dir():
+                shutil.copytree(source, files / name)
+            elif source.exists():
+                shutil.copy2(source, files / name)
+            else:
+                continue
+            stored[name] = file_digest(source)
+
+        manifest = {'stage': stage, 'key': key, 'inputs': inputs, 'outputs': stored,
+                    'created': time.strftime('%Y-%m-%dT%H:%M:%S'), **record}
+        with open(tmp / MANIFEST_FILE, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        return manifest
+
+    def restore(self, manifest):
+        """Put cached outputs back into the workspace; unchanged files are left alone"""
+        files = self._entry(manifest['stage'], manifest['key']) / FILES_DIR
+        for name, digest in manifest['outputs'].items():
+            target = self.workspace / name
+            if target.exists() and file_digest(target) == digest:
+                continue
+            if target.is_dir():
+                shutil.rmtree(target)
+            if (files / name).is_dir():
+                shutil.copytree(files / name, target)
+            else:
+                shutil.copy2(files / name, target)
+
+    def entries(self):
+        """Every cached manifest"""
+        return [json.loads(path.read_text())
+                for path in sorted(self.root.glob(f"*/*/{MANIFEST_FILE}"))]
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def edit_changes_key(script, module, workspace='.'):
+    """Whether editing module changes the cache key of a stage running script
+
+    The edit is made in a scratch copy of the workspace's sources.
+    """
+    with tempfile.TemporaryDirectory() as scratch:
+        for source in Path(workspace).glob('*.py'):
+            shutil.copy2(source, scratch)
+        cache = StageCache(scratch)
+        before = cache.key(cache.inputs(script, ''))
+        with open(Path(scratch) / module, 'a') as f:
+            f.write('\n# edited\n')
+        return cache.key(cache.inputs(script, '')) != before
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='List or clear cached stage results')
+    parser.add_argument('--workspace', default='.')
+    parser.add_argument('--clear', action='store_true')
+    parser.add_argument('--check', nargs=2, metavar=('SCRIPT', 'MODULE'), default=None,
+                        help="fail if editing MODULE changes the cache key of SCRIPT's stage")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        script, module = args.check
+        if edit_changes_key(script, module, args.workspace):
+            print(f"❌ Editing {module} invalidates cached results of {script}")
+            return 1
+        print(f"✅ Editing {module} leaves the cache key of {script} unchanged")
+        return 0
+
+    cache = StageCache(args.workspace)
+    if args.clear:
+        cache.clear()
+        print(f"🗑️ Cleared {cache.root}")
+        return
+
+    entries = cache.entries()
+    if not entries:
+        print(f"No cached stage results in {cache.root}")
+    for manifest in entries:
+        print(f"📦 {manifest['stage']:<10} {manifest['key'][:12]}  {manifest['created']}  "
+              f"{manifest.get('elapsed', 0):,.1f}s  {len(manifest['outputs'])} outputs  "
+              f"N = {manifest['inputs']['N_values']}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Out-of-Core Chunked Streaming Pipeline
+
+A chunk producer feeds the stopping-time kernel in worker processes.
+Each worker runs the whole chain of reducers (see reducers.py) on the
+compact uint16 array it just computed and returns only the partial
+reducers; the parent merges them in range order. Nothing proportional
+to N is kept, or even sent between processes: memory is bounded by the
+number of chunks in flight, which is derived from a configurable
+budget. Chunks are submitted only while fewer than that many results
+are outstanding, so a slow consumer applies backpressure to the workers
+instead of letting results pile up in the parent.
+
+Checkpoints are handled in the same pass: chunks never straddle a
+checkpoint, and the reducers are finalized as each one is crossed, so
+W, regression and histograms for every N cost a single sweep up to the
+largest N.
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import time
+from collections import deque
+from functools import partial
+import numpy as np
+
+import profiling
+import progress_monitor
+import resource_planner
+import worker_pool
+from advanced_verification import collatz_steps, STEPS_UNKNOWN
+from reducers import DEFAULT_REDUCERS, MAX_CHUNK, merge_partials, reduce_chunk
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024  # bytes
+DEFAULT_CHUNK_SIZE = 1 << 18
+# Worker working set per number: int64 kernel output, its uint16 copy
+# and the int64 temporaries of the reducers
+BYTES_PER_NUMBER = 4 * np.dtype(np.int64).itemsize + np.dtype(np.uint16).itemsize
+
+
+def steps_kernel(chunk):
+    """Stopping times for start..end as a compact uint16 array"""
+    start, end = chunk
+    chunk_start_time = time.perf_counter_ns()
+    progress_monitor.start_chunk(start)
+    steps = np.fromiter((collatz_steps(n) for n in range(start, end + 1)),
+                        dtype=np.int64, count=end - start + 1)
+    steps[steps < 0] = STEPS_UNKNOWN
+    steps = steps.astype(np.uint16)
+    progress_monitor.finish_chunk(len(steps), int(steps.sum(dtype=np.int64)),
+                                  time.perf_counter_ns() - chunk_start_time)
+    return start, steps
+
+
+def reduce_kernel(task):
+    """Stopping times of start..end folded into fresh reducers, in the worker"""
+    start, end, reducers = task
+    start, steps = steps_kernel((start, end))
+    return reduce_chunk(start, steps, reducers)
+
+
+def chunk_producer(checkpoints, chunk_size):
+    """Yield (start, end, checkpoint_or_None) covering 1..max(checkpoints)"""
+    start = 1
+    for N in sorted(checkpoints):
+        while start <= N:
+            end = min(start + chunk_size - 1, N)
+            yield start, end, (N if end == N else None)
+            start = end + 1
+
+
+def plan_chunks(processes, chunk_size, memory_budget):
+    """Chunk size and in-flight limit that respect the memory budget"""
+    chunk_size = min(chunk_size, MAX_CHUNK,
+                     max(1, memory_budget // (BYTES_PER_NUMBER * 2 * processes)))
+    max_in_flight = max(processes, memory_budget // (BYTES_PER_NUMBER * chunk_size))
+    return chunk_size, max_in_flight
+
+
+def stream_checkpoints(checkpoints, reducers=DEFAULT_REDUCERS, processes=None,
+                       chunk_size=DEFAULT_CHUNK_SIZE,
+                       memory_budget=None,
+                       metrics_file=None, report_interval=2.0, pool=None):
+    """Stream 1..max(checkpoints) through the reducers in a single pass
+
+    Yields (N, {reducer.name: reducer.finalize()}) for each checkpoint in
+    increasing order. processes and memory_budget default to the
+    resource plan, with the budget capped at DEFAULT_MEMORY_BUDGET. Work
+    runs on pool, by default the shared warm worker pool; processes only
+    sizes a new pool.
+    """
+    resources = resource_planner.plan()
+    if pool is None:
+        pool = worker_pool.shared_pool(processes or resources.processes)
+    if processes and processes != pool.processes:
+        print(f"⚠️ {processes} processes requested, but the running pool has "
+              f"{pool.processes}; streaming on the pool")
+    processes = pool.processes
+    if memory_budget is None:
+        memory_budget = min(DEFAULT_MEMORY_BUDGET, resources.memory_budget or DEFAULT_MEMORY_BUDGET)
+    chunk_size, max_in_flight = plan_chunks(processes, chunk_size, memory_budget)
+    active = [cls() for cls in reducers]
+
+    with pool.monitored(max(checkpoints), label=f"stream N={max(checkpoints):,}",
+                        interval=report_interval, metrics_file=metrics_file):
+        in_flight = deque()
+        chunks = chunk_producer(checkpoints, chunk_size)
+        exhausted = False
+
+        while in_flight or not exhausted:
+            # Top up the queue, but never beyond the in-flight limit
+            while not exhausted and len(in_flight) < max_in_flight:
+                try:
+                    start, end, checkpoint = next(chunks)
+                except StopIteration:
+                    exhausted = True
+                    break
+                in_flight.append((pool.apply_async(partial(profiling.run_profiled, reduce_kernel),
+                                                   ((start, end, reducers),)),
+                                  checkpoint))
+
+            # Merge strictly in range order so records stay correct
+            result, checkpoint = in_flight.popleft()
+            merge_partials(active, result.get())
+
+            if checkpoint is not None:
+                yield checkpoint, {r.name: r.finalize() for r in active}
@@ -0,0 +1,191 @@
+"""
+Thread-Pool Execution Backend
+
+The process backend (worker_pool.py) pays for starting workers,
+pickling every chunk's points and reducers back to the parent, and a
+copy of the interpreter per core. On hosts where process creation is
+expensive the thread backend does the same work inside one process:
+
+- one uint16 step table steps[n - 1] for 1..N is shared by all threads;
+  each thread writes its chunk into its own slice, so nothing is copied
+  or pickled
+- on a regular (GIL) build every thread runs the vectorized
+  fast_kernels.steps_uint64 kernel, whose array operations release the
+  GIL, and reduces its slice with the registered reducers (reducers.py)
+- on a free-threaded CPython build (3.13t and later, GIL disabled)
+  plain Python loops run in parallel, so threads use the pure-Python
+  collatz_steps kernel
+- progress goes to the same shared counters as the process backend, one
+  slot per thread, so ProgressMonitor reports work unchanged
+
+advanced_verification.py --backend thread selects it for every
+checkpoint. Running this file compares the two backends side by side:
+
+Usage:
+    python thread_backend.py --N 1e6
+    python thread_backend.py --N 1e7 --workers 8 --kernel python
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import argparse
+import sys
+import sysconfig
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import progress_monitor
+import resource_planner
+from advanced_verification import collatz_steps, STEPS_UNKNOWN
+from cli_numbers import parse_int
+from reducers import merge_partials, reduce_chunk, DEFAULT_REDUCERS, MAX_CHUNK
+
+KERNELS = ('numpy', 'python')
+CHUNKS_PER_THREAD = 16
+
+
+def free_threaded():
+    """True on a free-threaded CPython build running with the GIL disabled"""
+    if not sysconfig.get_config_var('Py_GIL_DISABLED'):
+        return False
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def default_kernel():
+    return 'python' if free_threaded() else 'numpy'
+
+
+def numpy_kernel(out, start):
+    """out[i] = stopping time of start + i, vectorized (releases the GIL)"""
+    from fast_kernels import steps_uint64
+    out[:] = steps_uint64(np.arange(start, start + len(out), dtype=np.uint64))
+
+
+def python_kernel(out, start):
+    """out[i] = stopping time of start + i, one number at a time"""
+    for i, n in enumerate(range(start, start + len(out))):
+        steps = collatz_steps(n)
+        out[i] = steps if steps >= 0 else STEPS_UNKNOWN
+
+
+class ThreadBackend:
+    """Threads filling one shared step table and reducing it in place"""
+
+    def __init__(self, threads=None, kernel=None):
+        self.threads = threads or resource_planner.available_cpus()
+        self.kernel = kernel or default_kernel()
+        if self.kernel not in KERNELS:
+            raise ValueError(f"unknown kernel {self.kernel!r}; choose from {', '.join(KERNELS)}")
+        self.counters = progress_monitor.ProgressCounters(self.threads)
+        self._local = threading.local()
+
+    def _init_thread(self):
+        with self.counters.next_slot.get_lock():
+            self._local.slot = self.counters.next_slot.value
+            self.counters.next_slot.value += 1
+
+    def _chunk(self, task):
+        """Fill and reduce table[start - 1:end]; runs in a pool thread"""
+        table, start, end, reducers = task
+        base = self._local.slot * progress_monitor.SLOT_FIELDS
+        values = self.counters.values
+        values[base + progress_monitor.CURRENT_CHUNK] = start
+        chunk_start_time = time.perf_counter_ns()
+
+        out = table[start - 1:end]
+        (numpy_kernel if self.kernel == 'numpy' else python_kernel)(out, start)
+        partials = reduce_chunk(start, out, reducers)
+
+        values[base + progress_monitor.NUMBERS_DONE] += len(out)
+        values[base + progress_monitor.STEPS_DONE] += int(out.sum(dtype=np.int64))
+        values[base + progress_monitor.BUSY_NS] += time.perf_counter_ns() - chunk_start_time
+        return partials
+
+    def compute(self, N, chunk_size=None, reducers=None, label='', interval=2.0,
+                metrics_file=None):
+        """(steps table, finalized reducers) for 1..N"""
+        if chunk_size is None:
+            chunk_size = max(1, -(-N // (self.threads * CHUNKS_PER_THREAD)))
+        chunk_size = min(chunk_size, MAX_CHUNK)
+        table = np.zeros(N, dtype=np.uint16)
+        tasks = [(table, start, min(start + chunk_size - 1, N), reducers)
+                 for start in range(1, N + 1, chunk_size)]
+        active = [cls() for cls in (DEFAULT_REDUCERS if reducers is None else reducers)]
+
+        self.counters.reset()
+        self.counters.next_slot.value = 0
+        monitor = progress_monitor.ProgressMonitor(self.counters, N, label=label,
+                                                   interval=interval, metrics_file=metrics_file)
+        monitor.start()
+        try:
+            with ThreadPoolExecutor(self.threads, initializer=self._init_thread) as executor:
+                # map keeps range order, which the records reducer relies on
+                for partials in executor.map(self._chunk, tasks):
+                    merge_partials(active, partials)
+        finally:
+            monitor.stop()
+        return table, {r.name: r.finalize() for r in active}
+
+
+def compare_backends(N, workers=None, kernel=None, repeat=1):
+    """Wall time and throughput of both backends on 1..N, plus agreement"""
+    import advanced_verification
+    import worker_pool
+
+    workers = workers or resource_planner.available_cpus()
+    rows = []
+    reduced = {}
+
+    pool_start = time.perf_counter()
+    with worker_pool.WorkerPool(workers) as pool:
+        pool_startup = time.perf_counter() - pool_start
+        for _ in range(repeat):
+            start = time.perf_counter()
+            _, _, reduced['process'], _ = advanced_verification.parallel_compute(
+                N, pool=pool, metrics_file=None, report_interval=3600)
+            rows.append(('process', 'python', time.perf_counter() - start, pool_startup))
+
+    backend = ThreadBackend(workers, kernel)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, reduced['thread'] = backend.compute(N, label=f"N={N:,} threads", interval=3600)
+        rows.append(('thread', backend.kernel, time.perf_counter() - start, 0.0))
+
+    agree = (reduced['process']['max'] == reduced['thread']['max'] and
+             np.array_equal(reduced['process']['histogram']['histogram'],
+                            reduced['thread']['histogram']['histogram']))
+    return rows, agree
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare the process and thread backends')
+    parser.add_argument('--N', default='1e6', help='range 1..N to compute, e.g. 1e7')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processes / threads (default: available CPUs)')
+    parser.add_argument('--kernel', choices=KERNELS, default=None,
+                        help='thread kernel (default: numpy, python on free-threaded builds)')
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    N = parse_int(args.N)
+    workers = args.workers or resource_planner.available_cpus()
+    print("=" * 80)
+    print(f"BACKEND COMPARISON: N = {N:,}, {workers} workers, "
+          f"{'free-threaded' if free_threaded() else 'GIL'} build (Python {sys.version.split()[0]})")
+    print("=" * 80)
+
+    rows, agree = compare_backends(N, workers, args.kernel, args.repeat)
+    print(f"{'backend':<10} {'kernel':<8} {'time (s)':>10} {'numbers/s':>14} {'pool start (s)':>15}")
+    for backend, kernel, elapsed, startup in rows:
+        print(f"{backend:<10} {kernel:<8} {elapsed:>10.3f} {N / elapsed:>14,.0f} {startup:>15.3f}")
+    print(f"\n{'✅ Backends agree' if agree else '❌ Backends DISAGREE'} on W and the histogram")
+    return 0 if agree else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+"""
+Multi-Resolution Density Tile Pyramid
+
+A scatter of every (steps, n) point stops being readable, or renderable,
+long before N = 10^9. The pyramid stores pre-aggregated point counts
+instead:
+
+- DensityReducer bins (steps, n) or (steps, log n) on the finest grid
+  during one streaming pass (see streaming_pipeline.py)
+- each coarser level sums pairs of rows of the level below, down to a
+  single tile row at level 0; the steps axis is only a few hundred
+  columns wide (about one screen), so it stays at full resolution
+- every level is a memory-mapped .npy of TILE x TILE tiles, stored tile
+  by tile, so a viewport only touches the tiles it overlaps
+
+    <name>.tiles/metadata.json     grid, scale and level shapes
+    <name>.tiles/level_<k>.npy     tiles_y x tiles_x x TILE x TILE counts
+
+render_view() picks the coarsest level that still has at least one row
+per output pixel, so any view reads roughly one screen of counts no
+matter how many points the pyramid covers.
+
+Usage:
+    python tile_pyramid.py build --N 1e8 --log
+    python tile_pyramid.py view collatz_density.tiles --steps 0 400 --n 1e6 1e7
+
+Author: Sahil Khan
+Email: ksksohail07@gmail.com
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+
+from cli_numbers import parse_int
+from reducers import register_reducer
+
+TILE = 256
+DEFAULT_ROWS = 4096
+DEFAULT_OUTPUT = 'collatz_density.tiles'
+METADATA_FILE = 'metadata.json'
+
+
+def n_bins(n, limit, rows, log_scale):
+    """Finest-level row of each n in [1, limit]"""
+    n = np.asarray(n, dtype=np.int64)
+    if log_scale:
+        return (np.log(n) * (rows / math.log(limit + 1))).astype(np.int64)
+    return (n - 1) * rows // limit
+
+
+def n_edges(rows, limit, log_scale):
+    """n at the lower edge of every finest-level row, plus the top edge"""
+    edges = np.arange(rows + 1, dtype=np.float64)
+    if log_scale:
+        return np.exp(edges * math.log(limit + 1) / rows)
+    return 1 + edges * limit / rows
+
+
+@register_reducer(default=False)
+class DensityReducer:
+    """Point counts on the finest pyramid grid: one column per stopping time
+
+    Mergeable like the reducers in reducers.py; the column count grows
+    with the largest stopping time seen.
+    """
+
+    name = 'density'
+
+    def __init__(self, limit, rows=DEFAULT_ROWS, log_scale=False):
+        self.limit = limit
+        self.rows = rows
+        self.log_scale = log_scale
+        self.counts = np.zeros((rows, 0), dtype=np.int64)
+
+    def _add(self, counts):
+        width = counts.shape[1]
+        if width > self.counts.shape[1]:
+            self.counts = np.pad(self.counts, ((0, 0), (0, width - self.counts.shape[1])))
+        self.counts[:, :width] += counts
+
+    def update(self, start, steps):
+        steps = np.asarray(steps, dtype=np.int64)
+        mask = steps > 0
+        if not mask.any():
+            return
+        steps = steps[mask]
+        rows = n_bins(start + np.flatnonzero(mask), self.limit, self.rows, self.log_scale)
+        width = int(steps.max()) + 1
+        counts = np.bincount(rows * width + steps, minlength=self.rows * width)
+        self._add(counts.reshape(self.rows, width))
+
+    def merge(self, other):
+        self._add(other.counts)
+
+    def finalize(self):
+        return {'counts': self.counts.copy()}
+
+    def __getstate__(self):
+        # Partial reducers travel from workers to the parent; a chunk only
+        # touches a few cells of the grid, so send the non-zero ones
+        state = self.__dict__.copy()
+        cells = np.flatnonzero(self.counts)
+        state['counts'] = (self.counts.shape, cells, self.counts.ravel()[cells])
+        return state
+
+    def __setstate__(self, state):
+        shape, cells, values = state['counts']
+        counts = np.zeros(shape, dtype=np.int64)
+        counts.ravel()[cells] = values
+        self.__dict__.update(state, counts=counts)
+
+
+def _round_up(value, multiple):
+    return max(multiple, -(-value // multiple) * multiple)
+
+
+def _downsample(counts):
+    """Sum pairs of rows, padding an odd row count with zeros"""
+    counts = np.pad(counts, ((0, counts.shape[0] % 2), (0, 0)))
+    return counts.reshape(counts.shape[0] // 2, 2, counts.shape[1]).sum(axis=1)
+
+
+def _write_level(path, counts):
+    """Store counts as a tiles_y x tiles_x x TILE x TILE memory-mapped array"""
+    rows, cols = _round_up(counts.shape[0], TILE), _round_up(counts.shape[1], TILE)
+    padded = np.zeros((rows, cols), dtype=counts.dtype)
+    padded[:counts.shape[0], :counts.shape[1]] = counts
+    tiles = padded.reshape(rows // TILE, TILE, cols // TILE, TILE).swapaxes(1, 2)
+
+    tmp = path.with_suffix('.tmp.npy')
+    out = np.lib.format.open_memmap(tmp, mode='w+', dtype=counts.dtype, shape=tiles.shape)
+    out[...] = tiles
+    out.flush()
+    del out
+    os.replace(tmp, path)
+
+
+def write_pyramid(path, counts, limit, log_scale):
+    """Write every level of the pyramid for a finest-level count grid"""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    # Level 0 is the coarsest; build from the finest level down to it
+    levels = [counts]
+    while levels[-1].shape[0] > TILE:
+        levels.append(_downsample(levels[-1]))
+    levels.reverse()
+
+    for k, level in enumerate(levels):
+        _write_level(path / f'level_{k}.npy', level)
+
+    metadata = {
+        'limit': limit,
+        'log_scale': log_scale,
+        'tile': TILE,
+        'rows': counts.shape[0],
+        'steps': counts.shape[1],
+        'points': int(counts.sum()),
+        'levels': [list(level.shape) for level in levels]
+    }
+    tmp = path / f'{METADATA_FILE}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp, path / METADATA_FILE)
+    return metadata
+
+
+def build_pyramid(N, path=DEFAULT_OUTPUT, rows=DEFAULT_ROWS, log_scale=False,
+                  processes=None, memory_budget=None, artifact=None):
+    """Aggregate n <= N in one streaming pass and write the pyramid
+
+    With artifact, stopping times are read from its memory-mapped step
+    table instead of being recomputed.
+    """
+    reducer_class = partial(DensityReducer, N, rows, log_scale)
+
+    if artifact is not None:
+        import results_artifact
+        from reducers import MAX_CHUNK
+        steps = results_artifact.load_artifact(artifact).steps
+        if len(steps) < N:
+            raise ValueError(f"artifact step table only covers n <= {len(steps):,}")
+        reducer = reducer_class()
+        for start in range(1, N + 1, MAX_CHUNK):
+            end = min(start + MAX_CHUNK - 1, N)
+            reducer.update(start, np.asarray(steps[start - 1:end]))
+        counts = reducer.finalize()['counts']
+    else:
+        # Imported lazily: streaming_pipeline pulls in the verification engine
+        import streaming_pipeline
+        options = {}
+        if memory_budget is not None:
+            options['memory_budget'] = memory_budget
+        for _, reduced in streaming_pipeline.stream_checkpoints(
+                [N], reducers=(reducer_class,), processes=processes, **options):
+            counts = reduced['density']['counts']
+
+    return write_pyramid(path, counts, N, log_scale)
+
+
+class TilePyramid:
+    """Read-only view of a pyramid; tiles are memory-mapped on first use"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / METADATA_FILE) as f:
+            self.metadata = json.load(f)
+        self._levels = {}
+
+    @property
+    def num_levels(self):
+        return len(self.metadata['levels'])
+
+    def level(self, k):
+        if k not in self._levels:
+            self._levels[k] = np.load(self.path / f'level_{k}.npy', mmap_mode='r')
+        return self._levels[k]
+
+    def tile(self, k, ty, tx):
+        return self.level(k)[ty, tx]
+
+    def _cell_size(self, k):
+        """Finest-level (rows, steps) covered by one cell of level k"""
+        return 2 ** (self.num_levels - 1 - k), 1
+
+    def _row_range(self, n_min, n_max):
+        meta = self.metadata
+        low, high = n_bins([max(1, n_min), min(meta['limit'], n_max)],
+                           meta['limit'], meta['rows'], meta['log_scale'])
+        return int(low), int(high) + 1
+
+    def choose_level(self, row_span, step_span, height, width):
+        """Coarsest level with at least one cell per output pixel on each axis
+
+        A viewport narrower than width steps cannot have a column per
+        pixel at any level, so the steps requirement is capped at step_span.
+        """
+        for k in range(self.num_levels):
+            rows_per_cell, steps_per_cell = self._cell_size(k)
+            if (row_span / rows_per_cell >= height and
+                    step_span / steps_per_cell >= min(width, step_span)):
+                return k
+        return self.num_levels - 1
+
+    def read_region(self, k, row0, row1, col0, col1):
+        """Counts of level k in [row0, row1) x [col0, col1), reading only overlapping tiles"""
+        region = np.zeros((row1 - row0, col1 - col0), dtype=self.level(k).dtype)
+        tiles_y, tiles_x = self.level(k).shape[:2]
+        for ty in range(row0 // TILE, min(tiles_y, -(-row1 // TILE))):
+            for tx in range(col0 // TILE, min(tiles_x, -(-col1 // TILE))):
+                r0, r1 = max(row0, ty * TILE), min(row1, (ty + 1) * TILE)
+                c0, c1 = max(col0, tx * TILE), min(col1, (tx + 1) * TILE)
+                region[r0 - row0:r1 - row0, c0 - col0:c1 - col0] = \
+                    self.tile(k, ty, tx)[r0 - ty * TILE:r1 - ty * TILE, c0 - tx * TILE:c1 - tx * TILE]
+        return region
+
+    def render_view(self, steps_range=None, n_range=None, width=800, height=600):
+        """Density counts for a viewport of (steps, n)
+
+        Returns (counts, extent, level): counts[i, j] for rows from low
+        to high n, and extent = (steps_min, steps_max, n_min, n_max) of
+        the cells actually returned.
+        """
+        meta = self.metadata
+        step0, step1 = steps_range or (0, meta['steps'])
+        row0, row1 = self._row_range(*(n_range or (1, meta['limit'])))
+        step0, step1 = max(0, int(step0)), min(meta['steps'], int(math.ceil(step1)))
+
+        k = self.choose_level(row1 - row0, step1 - step0, height, width)
+        rows_per_cell, steps_per_cell = self._cell_size(k)
+        r0, r1 = row0 // rows_per_cell, -(-row1 // rows_per_cell)
+        c0, c1 = step0 // steps_per_cell, -(-step1 // steps_per_cell)
+        counts = self.read_region(k, r0, r1, c0, c1)
+
+        edges = n_edges(meta['rows'], meta['limit'], meta['log_scale'])
+        extent = (c0 * steps_per_cell, c1 * steps_per_cell,
+                  float(edges[r0 * rows_per_cell]),
+                  float(edges[min(meta['rows'], r1 * rows_per_cell)]))
+        return counts, extent, k
+
+
+def plot_view(pyramid, output, steps_range=None, n_range=None, width=800, height=600):
+    """Render one viewport to a PNG"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
+
+    counts, extent, level = pyramid.render_view(steps_range, n_range, width, height)
+    log_scale = pyramid.metadata['log_scale']
+    dpi = 100
+    fig, ax = plt.subplots(figsize=(width / dpi, height / dpi), dpi=dpi)
+    masked = np.ma.masked_equal(np.asarray(counts, dtype=np.float64), 0)
+    if masked.count():
+        ax.imshow(masked, origin='lower', aspect='auto', interpolation='nearest',
+                  extent=(extent[0], extent[1], 0, 1) if log_scale else extent,
+                  norm=LogNorm(vmin=1, vmax=max(1, masked.max())), cmap='viridis')
+    if log_scale:
+        # Rows are uniform in log n; label the axis with n itself
+        ticks = np.linspace(0, 1, 6)
+        ax.set_yticks(ticks)
+        ax.set_yticklabels([f'{extent[2] * (extent[3] / extent[2]) ** t:.3g}' for t in ticks])
+    ax.set_xlabel('Steps (Width)')
+    ax.set_ylabel('n (Height, log scale)' if log_scale else 'n (Height)')
+    ax.set_title(f'Collatz density, level {level} of {pyramid.num_levels - 1}')
+    fig.tight_layout()
+    fig.savefig(output)
+    plt.close(fig)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Density tile pyramid for the (steps, n) plane')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help='aggregate n <= N into a pyramid')
+    build.add_argument('--N', required=True, help='e.g. 1e8 or 2^30')
+    build.add_argument('--output', default=DEFAULT_OUTPUT)
+    build.add_argument('--rows', type=int, default=DEFAULT_ROWS,
+                       help='finest-level bins along n')
+    build.add_argument('--log', action='store_true', help='bin log n instead of n')
+    build.add_argument('--processes', type=int, default=None)
+    build.add_argument('--memory-budget', type=int, default=None)
+    build.add_argument('--from-artifact', metavar='PATH', default=None,
+                       help='read stopping times from a saved step table')
+
+    view = sub.add_parser('view', help='render one viewport to a PNG')
+    view.add_argument('pyramid')
+    view.add_argument('--steps', nargs=2, type=float, default=None, metavar=('MIN', 'MAX'))
+    view.add_argument('--n', nargs=2, default=None, metavar=('MIN', 'MAX'))
+    view.add_argument('--size', nargs=2, type=int, default=(800, 600), metavar=('W', 'H'))
+    view.add_argument('--output', default='collatz_density_view.png')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        N = parse_int(args.N)
+        print(f"Building density pyramid for N = {N:,}...")
+        start = time.time()
+        metadata = build_pyramid(N, args.output, args.rows, args.log, args.processes,
+                                 args.memory_budget, args.from_artifact)
+        print(f"✅ {metadata['points']:,} points, {len(metadata['levels'])} levels "
+              f"saved to {args.output} ({time.time() - start:.1f}s)")
+    else:
+        pyramid = TilePyramid(args.pyramid)
+        n_range = tuple(parse_int(v) for v in args.n) if args.n else None
+        start = time.perf_counter()
+        plot_view(pyramid, args.output, args.steps, n_range, *args.size)
+        print(f"✅ Saved: {args.output} ({1000 * (time.perf_counter() - start):.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
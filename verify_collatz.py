@@ -11,6 +11,9 @@ Email: ksksohail07@gmail.com
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy import stats
+import argparse
+import results_artifact
+import figure_renderer
 
 def collatz_steps(n):
     """Compute stopping time for number n"""
@@ -70,30 +73,50 @@ def verify_data():
     
     print("=" * 60)
 
-def plot_parallelogram(N=10000):
-    """Visualize the Collatz parallelogram"""
-    data = compute_parallelogram_data(N)
-    points = data['points']
+def plot_parallelogram(N=10000, artifact=None):
+    """Visualize the Collatz parallelogram
     
-    x = [p[0] for p in points]
-    y = [p[1] for p in points]
+    With artifact (a path to a results artifact with a step table), the
+    points are memory-mapped from disk instead of recomputed.
+    """
+    if artifact is not None:
+        x, y = results_artifact.load_artifact(artifact).points(N)
+    else:
+        data = compute_parallelogram_data(N)
+        points = data['points']
+        
+        x = [p[0] for p in points]
+        y = [p[1] for p in points]
     
-    plt.figure(figsize=(12, 8))
-    plt.scatter(x, y, alpha=0.5, s=1)
+    # Re-rendering is skipped when the points and style are unchanged
+    return figure_renderer.render_figures([figure_renderer.RenderJob(
+        draw_parallelogram, {'N': N, 'x': np.asarray(x), 'y': np.asarray(y)},
+        f'collatz_parallelogram_N{N}.png', {'figsize': (12, 8), 'dpi': 300})])
+
+def draw_parallelogram(data, style, output):
+    """Scatter of (steps, n)"""
+    fig = plt.figure(figsize=style['figsize'])
+    plt.scatter(data['x'], data['y'], alpha=0.5, s=1)
     plt.xlabel('Steps (Width)', fontsize=12)
     plt.ylabel('n (Height)', fontsize=12)
-    plt.title(f'Collatz Parallelogram (N={N})', fontsize=14)
+    plt.title(f'Collatz Parallelogram (N={data["N"]})', fontsize=14)
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
-    plt.savefig(f'collatz_parallelogram_N{N}.png', dpi=300)
-    print(f"Saved visualization: collatz_parallelogram_N{N}.png")
+    plt.savefig(output, dpi=style['dpi'])
+    plt.close(fig)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Basic Collatz verification')
+    parser.add_argument('--from-artifact', metavar='PATH', default=None,
+                        help='plot from the step table of a saved results artifact')
+    args = parser.parse_args()
+    
     # Verify the data
-    verify_data()
+    if not args.from_artifact:
+        verify_data()
     
     # Create visualization
     print("\nGenerating visualization...")
-    plot_parallelogram(10000)
+    plot_parallelogram(10000, artifact=args.from_artifact)
     
     print("\nVerification complete!")